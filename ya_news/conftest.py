@@ -1,13 +1,45 @@
 import pytest
 
+from copy import deepcopy
 from datetime import timedelta
 from django.utils import timezone
 from django.conf import settings
+from django.test import override_settings
 from django.urls import reverse
 
+from news.cache import get_page_cache, get_version_cache
 from news.models import News, Comment
 
 
+@pytest.fixture(scope='session', autouse=True)
+def file_caches_in_tmp(tmp_path_factory):
+    """Файловые кеши тестов не попадают в каталог проекта."""
+    caches = deepcopy(settings.CACHES)
+    directory = tmp_path_factory.mktemp('cache')
+    for alias, options in caches.items():
+        if options['BACKEND'].endswith('.FileBasedCache'):
+            options['LOCATION'] = directory / alias
+    with override_settings(CACHES=caches):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_page_cache():
+    get_page_cache().clear()
+    get_version_cache().clear()
+
+
+@pytest.fixture(autouse=True)
+def search_index_dir(settings, tmp_path):
+    settings.NEWS_SEARCH_INDEX_DIR = tmp_path / 'search_index'
+
+
+@pytest.fixture(autouse=True)
+def read_from_primary(settings):
+    # Данные теста не видны реплике до конца его транзакции.
+    settings.NEWS_REPLICA_DATABASE = None
+
+
 @pytest.fixture
 def author(django_user_model):
     return django_user_model.objects.create(username='Автор')
@@ -55,6 +87,11 @@ def comment(author, news):
     return comment
 
 
+@pytest.fixture
+def comment_id_for_args(comment):
+    return comment.id,
+
+
 @pytest.fixture
 def comments_list(author, news):
     now = timezone.now()
@@ -1,15 +1,68 @@
 from django.contrib import admin
+from django.forms.models import BaseInlineFormSet
 
 from .models import Comment, News
+from .moderation import review_comments
+
+
+class LatestCommentsFormSet(BaseInlineFormSet):
+    """Только последние комментарии новости, а не все сразу."""
+    max_comments = 50
+
+    def get_queryset(self):
+        if not hasattr(self, '_latest'):
+            queryset = super().get_queryset()
+            latest = list(queryset.order_by('-created', '-id').values_list(
+                'pk', flat=True
+            )[:self.max_comments])
+            self._latest = queryset.filter(
+                pk__in=latest
+            ).select_related('author')
+        return self._latest
 
 
 class CommentInline(admin.StackedInline):
     model = Comment
+    formset = LatestCommentsFormSet
+    raw_id_fields = ('author',)
+    # Смена статуса через save() не учитывается в comment_count.
+    readonly_fields = ('status',)
     extra = 0
 
 
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
+    list_display = ('title', 'date', 'comment_count')
+    date_hierarchy = 'date'
+    show_full_result_count = False
     inlines = [
         CommentInline,
     ]
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    """Комментарии; ожидающие модерации решаются действиями списка."""
+    list_display = ('__str__', 'news', 'author', 'created', 'status')
+    list_filter = ('status',)
+    list_select_related = ('news', 'author')
+    raw_id_fields = ('news', 'author')
+    # Смена статуса через save() не учитывается в comment_count.
+    readonly_fields = ('status',)
+    actions = ('publish', 'reject')
+
+    def review(self, request, queryset, publish):
+        count = review_comments(
+            list(queryset.values_list('pk', flat=True)), publish
+        )
+        self.message_user(
+            request, f'Обработано комментариев на модерации: {count}.'
+        )
+
+    @admin.action(description='Опубликовать ожидающие модерации')
+    def publish(self, request, queryset):
+        self.review(request, queryset, publish=True)
+
+    @admin.action(description='Отклонить ожидающие модерации')
+    def reject(self, request, queryset):
+        self.review(request, queryset, publish=False)
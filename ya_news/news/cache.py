@@ -0,0 +1,126 @@
+from hashlib import md5
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_KEY = 'news:pages:version'
+NEWS_GENERATION_KEY = 'news:pages:generation'
+NEWS_VERSION_KEY = 'news:pages:version:{generation}:{news_id}'
+COMMENTS_KEY = 'news:comments:{news_id}:{version}:{cursor_hash}'
+PAGE_KEY = 'news:pages:{version}:{path_hash}'
+HITS_KEY = 'news:pages:hits'
+MISSES_KEY = 'news:pages:misses'
+
+
+def get_page_cache():
+    """Кеш, в котором хранятся отрисованные страницы."""
+    return caches[settings.NEWS_PAGE_CACHE_ALIAS]
+
+
+def get_version_cache():
+    """
+    Кеш с версиями страниц.
+
+    Версии входят в ETag, поэтому должны быть общими для всех процессов,
+    даже если сами страницы хранятся в памяти каждого из них.
+    """
+    return caches[settings.NEWS_VERSION_CACHE_ALIAS]
+
+
+def _increment(key):
+    page_cache = get_page_cache()
+    page_cache.add(key, 0, timeout=None)
+    try:
+        return page_cache.incr(key)
+    except ValueError:
+        # Ключ успели вытеснить между add и incr.
+        page_cache.set(key, 1, timeout=None)
+        return 1
+
+
+def _new_version():
+    # Версия начинается с текущего времени, чтобы после вытеснения ключа
+    # она не совпала с уже выданной клиентам в ETag.
+    return time_ns()
+
+
+def _get_version(key):
+    version_cache = get_version_cache()
+    version_cache.add(key, _new_version(), timeout=None)
+    return version_cache.get(key) or _new_version()
+
+
+def _bump_version(key):
+    version_cache = get_version_cache()
+    try:
+        return version_cache.incr(key)
+    except ValueError:
+        version = _new_version()
+        version_cache.set(key, version, timeout=None)
+        return version
+
+
+def get_content_version():
+    """Текущая версия содержимого новостей и комментариев."""
+    return _get_version(VERSION_KEY)
+
+
+def bump_content_version():
+    """Делает недействительными все ранее сохранённые страницы."""
+    return _bump_version(VERSION_KEY)
+
+
+def _news_version_key(news_id):
+    # Ключи версий всех новостей зависят от общего поколения.
+    return NEWS_VERSION_KEY.format(
+        generation=_get_version(NEWS_GENERATION_KEY), news_id=news_id
+    )
+
+
+def get_news_version(news_id):
+    """Текущая версия одной новости вместе с её комментариями."""
+    return _get_version(_news_version_key(news_id))
+
+
+def bump_news_version(news_id):
+    """Отмечает изменение новости или её комментариев."""
+    return _bump_version(_news_version_key(news_id))
+
+
+def bump_all_news_versions():
+    """Меняет версии всех новостей разом, например после загрузки."""
+    return _bump_version(NEWS_GENERATION_KEY)
+
+
+def page_cache_key(path):
+    path_hash = md5(path.encode()).hexdigest()
+    return PAGE_KEY.format(
+        version=get_content_version(), path_hash=path_hash
+    )
+
+
+def comments_cache_key(news_id, cursor):
+    cursor_hash = md5((cursor or '').encode()).hexdigest()
+    return COMMENTS_KEY.format(
+        news_id=news_id,
+        version=get_news_version(news_id),
+        cursor_hash=cursor_hash,
+    )
+
+
+def count_hit():
+    _increment(HITS_KEY)
+
+
+def count_miss():
+    _increment(MISSES_KEY)
+
+
+def get_stats():
+    """Количество попаданий и промахов кеша страниц."""
+    page_cache = get_page_cache()
+    return {
+        'hits': page_cache.get(HITS_KEY, 0),
+        'misses': page_cache.get(MISSES_KEY, 0),
+    }
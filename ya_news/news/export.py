@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+import zlib
+from collections import defaultdict
+from itertools import islice
+
+from .models import Comment, News
+
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+CSV_HEADER = (
+    'news_id', 'news_title', 'news_text', 'news_date',
+    'comment_id', 'comment_author', 'comment_text', 'comment_created',
+)
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def iter_chunks(chunk_size):
+    """
+    Новости с опубликованными комментариями пачками по chunk_size.
+
+    Новости читаются итератором, а комментарии к пачке выбираются
+    одним запросом с IN, поэтому в памяти одновременно только одна пачка.
+    """
+    news_iterator = News.objects.order_by('pk').values(
+        'id', 'title', 'text', 'date'
+    ).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(news_iterator, chunk_size))
+        if not chunk:
+            return
+        comments = defaultdict(list)
+        for comment in Comment.objects.filter(
+            news_id__in=[news['id'] for news in chunk],
+            status=Comment.Status.PUBLISHED,
+        ).order_by('news_id', 'created', 'pk').values(
+            'id', 'news_id', 'author__username', 'text', 'created'
+        ):
+            comments[comment['news_id']].append(comment)
+        yield [(news, comments[news['id']]) for news in chunk]
+
+
+def jsonl_chunks(chunks):
+    """Одна строка JSON на новость, комментарии вложены в неё."""
+    for chunk in chunks:
+        yield ''.join(
+            json.dumps(
+                {
+                    'id': news['id'],
+                    'title': news['title'],
+                    'text': news['text'],
+                    'date': news['date'].isoformat(),
+                    'comments': [
+                        {
+                            'id': comment['id'],
+                            'author': comment['author__username'],
+                            'text': comment['text'],
+                            'created': comment['created'].isoformat(),
+                        }
+                        for comment in comments
+                    ],
+                },
+                ensure_ascii=False,
+            ) + '\n'
+            for news, comments in chunk
+        )
+
+
+def csv_chunks(chunks):
+    """Одна строка CSV на комментарий; новость без комментариев — одна
+    строка с пустыми полями комментария.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for chunk in chunks:
+        for news, comments in chunk:
+            news_fields = (
+                news['id'], news['title'], news['text'],
+                news['date'].isoformat(),
+            )
+            if not comments:
+                writer.writerow(news_fields + ('',) * 4)
+            for comment in comments:
+                writer.writerow(news_fields + (
+                    comment['id'],
+                    comment['author__username'],
+                    comment['text'],
+                    comment['created'].isoformat(),
+                ))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=GZIP_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_news(export_format, chunk_size, compress=False):
+    """Байтовые куски выгрузки новостей в формате jsonl или csv."""
+    writer = jsonl_chunks if export_format == 'jsonl' else csv_chunks
+    chunks = (text.encode() for text in writer(iter_chunks(chunk_size)))
+    return gzip_chunks(chunks) if compress else chunks
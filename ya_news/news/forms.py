@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.forms import ModelForm
 from django.core.exceptions import ValidationError
 
 from .models import Comment
+from .profanity import BadWordsFilter
 
 BAD_WORDS = (
     'редиска',
@@ -10,6 +12,10 @@ BAD_WORDS = (
 )
 WARNING = 'Не ругайтесь!'
 
+bad_words_filter = BadWordsFilter(
+    BAD_WORDS, settings.BAD_WORDS_FILE, settings.BAD_WORDS_ENGINE
+)
+
 
 class CommentForm(ModelForm):
 
@@ -17,11 +23,16 @@ class CommentForm(ModelForm):
         model = Comment
         fields = ('text',)
 
+    check_bad_words = True
+
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if self.check_bad_words and bad_words_filter.contains(text):
+            raise ValidationError(WARNING)
         return text
+
+
+class PendingCommentForm(CommentForm):
+    """Форма нового комментария, который проверит фоновая модерация."""
+    check_bad_words = False
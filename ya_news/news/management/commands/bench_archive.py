@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from news.models import News
+from news.pagination import keyset_page
+
+from ._bench import measure, rolled_back
+
+BATCH_SIZE = 10_000
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время выдачи страниц архива по курсору и через OFFSET. '
+        'Тестовые новости создаются в транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        size = settings.NEWS_COUNT_ON_ARCHIVE_PAGE
+        with rolled_back():
+            self.seed(rows)
+            self.stdout.write(
+                f'{"страница":>10} {"курсор, мс":>12} {"OFFSET, мс":>12}'
+            )
+            for page in self.pages(rows // size):
+                offset = page * size
+                cursor = None
+                if offset:
+                    last = News.objects.order_by('-date', '-pk').values_list(
+                        'date', 'pk'
+                    )[offset - 1]
+                    cursor = tuple(last)
+                keyset = measure(
+                    lambda: keyset_page(
+                        News.objects.all(), 'date', cursor, size,
+                        descending=True,
+                    ),
+                    options['repeat'],
+                )
+                offset_based = measure(
+                    lambda: list(
+                        News.objects.order_by('-date', '-pk')[
+                            offset:offset + size
+                        ]
+                    ),
+                    options['repeat'],
+                )
+                self.stdout.write(
+                    f'{page + 1:>10} {keyset:>12.2f} {offset_based:>12.2f}'
+                )
+
+    def seed(self, rows):
+        today = date.today()
+        for start in range(0, rows, BATCH_SIZE):
+            News.objects.bulk_create(
+                News(
+                    title=f'Новость {index}',
+                    text='Текст новости.',
+                    date=today - timedelta(days=index // 100),
+                )
+                for index in range(start, min(start + BATCH_SIZE, rows))
+            )
+
+    @staticmethod
+    def pages(total):
+        page = 0
+        while page < total - 1:
+            yield page
+            page = page * 10 or 1
+        if total:
+            yield total - 1
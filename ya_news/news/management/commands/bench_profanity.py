@@ -0,0 +1,59 @@
+import random
+
+from django.core.management.base import BaseCommand
+
+from news.profanity import ENGINES
+
+from ._bench import measure
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def linear_scan(words, text):
+    """Прежняя проверка из CommentForm.clean_text."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return True
+    return False
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает проверку запрещённых слов циклом по списку '
+        'и движками из news.profanity.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--words', type=int, default=10_000)
+        parser.add_argument('--text-size', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        generator = random.Random(options['seed'])
+        words = [
+            ''.join(generator.choices(ALPHABET, k=generator.randint(7, 12)))
+            for _ in range(options['words'])
+        ]
+        text = ''
+        while len(text) < options['text_size']:
+            text += ''.join(
+                generator.choices(ALPHABET, k=generator.randint(2, 10))
+            ) + ' '
+        self.stdout.write(
+            f'Слов: {len(words)}, размер текста: {len(text)} символов'
+        )
+        baseline = measure(
+            lambda: linear_scan(words, text), options['repeat']
+        )
+        self.stdout.write(f'{"цикл по списку":<16} {baseline:>10.2f} мс')
+        for name, engine in ENGINES.items():
+            matcher = engine(words)
+            elapsed = measure(
+                lambda: matcher.search(text.lower()), options['repeat']
+            )
+            self.stdout.write(
+                f'{name:<16} {elapsed:>10.2f} мс '
+                f'(в {baseline / elapsed:.1f} раза быстрее)'
+            )
@@ -0,0 +1,90 @@
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+SCHEMA = (
+    'CREATE TABLE comment ('
+    'id INTEGER PRIMARY KEY, news_id INTEGER, text TEXT, created TEXT)'
+)
+INSERT = (
+    "INSERT INTO comment (news_id, text, created) "
+    "VALUES (?, ?, datetime('now'))"
+)
+
+
+def run_writers(path, pragmas, threads, writes):
+    """
+    Пишет в базу из нескольких потоков, по транзакции на запись.
+
+    Возвращает время в секундах и число ошибок «database is locked».
+    """
+    errors = []
+    barrier = threading.Barrier(threads)
+
+    def writer(number):
+        connection = sqlite3.connect(path, isolation_level=None)
+        for name, value in pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        barrier.wait()
+        for index in range(writes):
+            try:
+                connection.execute('BEGIN')
+                connection.execute(INSERT, (number, f'Текст {index}'))
+                connection.execute('COMMIT')
+            except sqlite3.OperationalError:
+                errors.append(number)
+                if connection.in_transaction:
+                    connection.execute('ROLLBACK')
+        connection.close()
+
+    workers = [
+        threading.Thread(target=writer, args=(number,))
+        for number in range(threads)
+    ]
+    start = perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return perf_counter() - start, len(errors)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает конкурентную запись в SQLite с настройками '
+        'по умолчанию и с PRAGMAS из DATABASES.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--writes', type=int, default=200)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        modes = {
+            'по умолчанию': {},
+            'PRAGMAS': settings.DATABASES[options['database']].get(
+                'PRAGMAS', {}
+            ),
+        }
+        total = options['threads'] * options['writes']
+        self.stdout.write(
+            f'Потоков: {options["threads"]}, транзакций: {total}'
+        )
+        for name, pragmas in modes.items():
+            with tempfile.TemporaryDirectory() as directory:
+                path = str(Path(directory) / 'bench.sqlite3')
+                with sqlite3.connect(path) as connection:
+                    connection.execute(SCHEMA)
+                elapsed, errors = run_writers(
+                    path, pragmas, options['threads'], options['writes']
+                )
+            self.stdout.write(
+                f'{name:<14} {total / elapsed:>10.0f} транзакций/с, '
+                f'ошибок блокировки: {errors}'
+            )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.template import TemplateSyntaxError
+
+from yanews.warmup import load_template, template_names
+
+
+class Command(BaseCommand):
+    help = (
+        'Компилирует все шаблоны проекта и выводит время первой загрузки '
+        'и загрузки из кеша для каждого.'
+    )
+
+    def handle(self, *args, **options):
+        errors = 0
+        total = 0
+        for name in template_names():
+            try:
+                compiled = load_template(name)
+            except TemplateSyntaxError as error:
+                errors += 1
+                self.stderr.write(f'{name}: {error}')
+                continue
+            cached = load_template(name)
+            total += compiled
+            self.stdout.write(
+                f'{name:<36} {compiled:>8.2f} мс, из кеша {cached:.3f} мс'
+            )
+        self.stdout.write(f'Всего: {total:.2f} мс')
+        if errors:
+            raise CommandError(f'Шаблонов с ошибками: {errors}')
@@ -0,0 +1,18 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from news.search import get_index
+
+
+class Command(BaseCommand):
+    help = 'Сливает журнал поискового индекса с сегментом.'
+
+    def handle(self, *args, **options):
+        start = perf_counter()
+        if not get_index().compact():
+            self.stdout.write('Индекс изменился во время слияния, повторите.')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Журнал слит за {perf_counter() - start:.1f} с'
+        ))
@@ -0,0 +1,170 @@
+import json
+from contextlib import contextmanager
+from itertools import islice
+from time import perf_counter
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries, transaction
+
+from news.cache import bump_all_news_versions, bump_content_version
+
+READ_SIZE = 1 << 20
+SEPARATORS = ' \t\r\n,'
+MODELS = ('news.news', 'news.comment')
+
+
+class FixtureReader:
+    """
+    Элементы JSON-массива верхнего уровня, прочитанные по частям.
+
+    В памяти одновременно находится только необработанный хвост файла.
+    """
+
+    def __init__(self, stream, read_size=READ_SIZE):
+        self.stream = stream
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def read_more(self, size):
+        chunk = self.stream.read(size)
+        self.eof = not chunk
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    def next_char(self):
+        """Первый значимый символ или None в конце файла."""
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and self.buffer[self.position] in SEPARATORS
+            ):
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if self.eof:
+                return None
+            self.read_more(self.read_size)
+
+    def decode(self):
+        while True:
+            try:
+                obj, self.position = self.decoder.raw_decode(
+                    self.buffer, self.position
+                )
+                return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise CommandError('Некорректный JSON в фикстуре.')
+                # Объект не поместился в буфер: дочитываем не меньше,
+                # чем уже накоплено, чтобы не разбирать его заново много раз.
+                self.read_more(
+                    max(self.read_size, len(self.buffer) - self.position)
+                )
+
+    def __iter__(self):
+        if self.next_char() != '[':
+            raise CommandError('Фикстура должна быть массивом JSON.')
+        self.position += 1
+        while True:
+            char = self.next_char()
+            if char is None:
+                raise CommandError('Файл фикстуры неожиданно закончился.')
+            if char == ']':
+                return
+            yield self.decode()
+
+
+def build_instance(data):
+    label = data.get('model', '').lower()
+    if label not in MODELS:
+        raise CommandError(f'Модель {label!r} не поддерживается.')
+    model = apps.get_model(label)
+    values = {}
+    for name, value in data['fields'].items():
+        field = model._meta.get_field(name)
+        values[field.attname] = field.to_python(value)
+    return model(pk=data.get('pk'), **values)
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """bulk_create не должен подменять даты из фикстуры текущим временем."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает новости и комментарии из фикстуры в формате loaddata, '
+        'читая файл потоком и сохраняя строки пачками через bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixture', help='Путь к JSON-фикстуре.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--no-reindex',
+            action='store_true',
+            help='Не перестраивать поисковый индекс после загрузки.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        loaded = {label: 0 for label in MODELS}
+        start = perf_counter()
+        with open(options['fixture'], encoding='utf-8') as stream:
+            instances = map(build_instance, FixtureReader(stream))
+            with transaction.atomic():
+                while True:
+                    batch = list(islice(instances, batch_size))
+                    if not batch:
+                        break
+                    self.save_batch(batch, loaded)
+                    # При DEBUG Django копит тексты всех запросов.
+                    reset_queries()
+                    total = sum(loaded.values())
+                    self.stdout.write(
+                        f'Загружено строк: {total} '
+                        f'({total / (perf_counter() - start):.0f} строк/с)'
+                    )
+        # Массовая вставка не вызывает сигналы: обновляем производные
+        # данные один раз после загрузки.
+        if loaded['news.comment']:
+            call_command('recount_comments', stdout=self.stdout)
+        bump_content_version()
+        bump_all_news_versions()
+        if not options['no_reindex']:
+            call_command('rebuild_search_index', stdout=self.stdout)
+        elapsed = perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Новостей: {loaded["news.news"]}, '
+            f'комментариев: {loaded["news.comment"]}, '
+            f'за {elapsed:.1f} с'
+        ))
+
+    @staticmethod
+    def save_batch(batch, loaded):
+        by_model = {}
+        for instance in batch:
+            by_model.setdefault(instance._meta.label_lower, []).append(
+                instance
+            )
+        for label, instances in by_model.items():
+            model = apps.get_model(label)
+            with keep_auto_now_add(model):
+                model.objects.bulk_create(instances)
+            loaded[label] += len(instances)
@@ -0,0 +1,74 @@
+import threading
+from statistics import quantiles
+from time import perf_counter
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand
+
+
+def run_clients(url, clients, requests):
+    """
+    Запросы к url из нескольких потоков-клиентов.
+
+    Возвращает общее время в секундах, задержки в миллисекундах
+    и число неудачных запросов.
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients)
+
+    def client():
+        barrier.wait()
+        for _ in range(requests):
+            start = perf_counter()
+            try:
+                with urlopen(url) as response:
+                    response.read()
+            except (URLError, OSError):
+                errors.append(url)
+                continue
+            with lock:
+                latencies.append((perf_counter() - start) * 1000)
+
+    workers = [threading.Thread(target=client) for _ in range(clients)]
+    start = perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return perf_counter() - start, latencies, len(errors)
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает запущенный сервер параллельными клиентами и выводит '
+        'запросы в секунду, p50 и p99. Запустите проект под WSGI '
+        '(gunicorn yanews.wsgi) и под ASGI (uvicorn yanews.asgi:application '
+        'с NEWS_ASYNC_VIEWS = True) и сравните результаты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+')
+        parser.add_argument('--clients', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=50)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'Клиентов: {options["clients"]}, '
+            f'запросов на клиента: {options["requests"]}'
+        )
+        for url in options['urls']:
+            elapsed, latencies, errors = run_clients(
+                url, options['clients'], options['requests']
+            )
+            if len(latencies) < 2:
+                self.stdout.write(f'{url}: нет ответов, ошибок {errors}')
+                continue
+            cuts = quantiles(latencies, n=100)
+            self.stdout.write(
+                f'{url}: {len(latencies) / elapsed:.0f} запросов/с, '
+                f'p50 {cuts[49]:.1f} мс, p99 {cuts[98]:.1f} мс, '
+                f'ошибок {errors}'
+            )
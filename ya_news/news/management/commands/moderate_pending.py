@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from news.models import Comment
+from news.moderation import moderate_comments
+
+
+class Command(BaseCommand):
+    help = (
+        'Проводит модерацию комментариев, оставшихся на модерации, '
+        'например после перезапуска процесса с очередью.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        pending = Comment.objects.filter(
+            status=Comment.Status.PENDING
+        ).order_by('pk').values_list('pk', flat=True)
+        last_pk = 0
+        total = 0
+        while True:
+            batch = list(
+                pending.filter(pk__gt=last_pk)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            moderate_comments(batch)
+            last_pk = batch[-1]
+            total += len(batch)
+        self.stdout.write(
+            self.style.SUCCESS(f'Проверено комментариев: {total}')
+        )
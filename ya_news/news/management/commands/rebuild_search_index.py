@@ -0,0 +1,35 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from news.models import Comment, News
+from news.search import COMMENT, NEWS, get_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает поисковый индекс новостей и комментариев, '
+        'читая базу потоком.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        start = perf_counter()
+        count = get_index().rebuild(self.documents(options['chunk_size']))
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано документов: {count} '
+            f'за {perf_counter() - start:.1f} с'
+        ))
+
+    @staticmethod
+    def documents(chunk_size):
+        news = News.objects.order_by().values_list('pk', 'title', 'text')
+        for pk, title, text in news.iterator(chunk_size=chunk_size):
+            yield NEWS, pk, f'{title}\n{text}'
+        comments = Comment.objects.filter(
+            status=Comment.Status.PUBLISHED
+        ).order_by().values_list('pk', 'text')
+        for pk, text in comments.iterator(chunk_size=chunk_size):
+            yield COMMENT, pk, text
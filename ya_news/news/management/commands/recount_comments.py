@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from news.cache import bump_content_version
+from news.models import Comment, News
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчик комментариев у всех новостей.'
+
+    def handle(self, *args, **options):
+        counts = Comment.objects.filter(
+            news=OuterRef('pk'), status=Comment.Status.PUBLISHED
+        ).order_by().values('news').annotate(total=Count('pk')).values(
+            'total'
+        )
+        updated = News.objects.update(
+            comment_count=Coalesce(Subquery(counts), 0)
+        )
+        # UPDATE не вызывает сигналы, а счётчики видны на главной и в архиве.
+        bump_content_version()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано новостей: {updated}')
+        )
@@ -0,0 +1,63 @@
+import asyncio
+
+from django.conf import settings
+
+from .routers import read_from_replica
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+class ReadReplicaMiddleware:
+    """
+    Направляет чтение безопасных запросов в реплику.
+
+    После изменяющего запроса пользователь на NEWS_REPLICA_STICKY_SECONDS
+    получает cookie и читает из основной базы, чтобы видеть свои записи.
+    Работает и под WSGI, и под ASGI без переключения потоков.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django распознаёт асинхронное промежуточное ПО.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        token = read_from_replica.set(self.use_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+        return self.mark_sticky(request, response)
+
+    async def __acall__(self, request):
+        token = read_from_replica.set(self.use_replica(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+        return self.mark_sticky(request, response)
+
+    def use_replica(self, request):
+        return bool(
+            settings.NEWS_REPLICA_DATABASE
+            and request.method in SAFE_METHODS
+            and settings.NEWS_REPLICA_STICKY_COOKIE not in request.COOKIES
+        )
+
+    def mark_sticky(self, request, response):
+        if settings.NEWS_REPLICA_DATABASE and (
+            request.method not in SAFE_METHODS
+        ):
+            response.set_cookie(
+                settings.NEWS_REPLICA_STICKY_COOKIE,
+                '1',
+                max_age=settings.NEWS_REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 05:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_comment_news_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='status',
+            field=models.CharField(choices=[('published', 'Опубликован'), ('pending', 'На модерации'), ('rejected', 'Отклонён')], default='published', max_length=16),
+        ),
+    ]
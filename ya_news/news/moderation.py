@@ -0,0 +1,253 @@
+import logging
+import zlib
+from collections import defaultdict
+from concurrent.futures import (
+    BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+)
+from multiprocessing import get_context
+from queue import Empty, Queue
+from threading import Lock, Thread
+
+import django
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from .cache import bump_content_version, bump_news_version
+from .forms import bad_words_filter
+from .models import Comment, News
+from .search import COMMENT, get_index
+
+# Латинские буквы и цифры, которыми подменяют похожие кириллические.
+HOMOGLYPHS = str.maketrans('aeopcxykmthb03', 'аеорсхукмтнвоз')
+REPETITIVE_MIN_LENGTH = 200
+REPETITIVE_MAX_RATIO = 0.1
+
+logger = logging.getLogger(__name__)
+
+
+def is_repetitive(text):
+    """Длинный текст, который почти целиком состоит из повторов."""
+    encoded = text.encode()
+    if len(encoded) < REPETITIVE_MIN_LENGTH:
+        return False
+    return len(zlib.compress(encoded)) / len(encoded) < REPETITIVE_MAX_RATIO
+
+
+def check_text(text):
+    """Можно ли публиковать комментарий с таким текстом."""
+    normalized = text.lower().translate(HOMOGLYPHS)
+    return not (
+        bad_words_filter.contains(text)
+        or bad_words_filter.contains(normalized)
+        or is_repetitive(text)
+    )
+
+
+def check_texts(texts):
+    """Проверка пачки текстов; выполняется в пуле потоков или процессов."""
+    return [check_text(text) for text in texts]
+
+
+def load_pending(comment_ids):
+    return list(
+        Comment.objects.filter(
+            pk__in=comment_ids, status=Comment.Status.PENDING
+        ).values_list('pk', 'news_id', 'author_id', 'text')
+    )
+
+
+def find_duplicates(comments):
+    """Комментарии, повторяющие более ранний текст того же автора."""
+    seen = set()
+    duplicates = set()
+    for pk, _, author_id, text in comments:
+        if (author_id, text) in seen:
+            duplicates.add(pk)
+        seen.add((author_id, text))
+    return duplicates
+
+
+def apply_verdicts(comments, verdicts, reject_duplicates=True):
+    """
+    Публикует одобренные комментарии и отклоняет остальные.
+
+    Меняются только комментарии, всё ещё ожидающие модерации, и счётчик
+    растёт на число действительно опубликованных: удалённый за время
+    проверки комментарий не учитывается.
+    """
+    duplicates = find_duplicates(comments) if reject_duplicates else set()
+    published = defaultdict(list)
+    rejected = []
+    for comment, verdict in zip(comments, verdicts):
+        pk, news_id, *_ = comment
+        if verdict and pk not in duplicates:
+            published[news_id].append(pk)
+        else:
+            rejected.append(pk)
+    pending = Comment.objects.filter(status=Comment.Status.PENDING)
+    per_news = {}
+    with transaction.atomic():
+        for news_id, ids in published.items():
+            count = pending.filter(pk__in=ids).update(
+                status=Comment.Status.PUBLISHED
+            )
+            if count:
+                per_news[news_id] = count
+                News.objects.filter(pk=news_id).update(
+                    comment_count=F('comment_count') + count
+                )
+        pending.filter(pk__in=rejected).update(
+            status=Comment.Status.REJECTED
+        )
+    if not per_news:
+        return
+    texts = {pk: text for pk, *_, text in comments}
+    ids = [pk for news_id in per_news for pk in published[news_id]]
+    if sum(per_news.values()) < len(ids):
+        ids = Comment.objects.filter(
+            pk__in=ids, status=Comment.Status.PUBLISHED
+        ).values_list('pk', flat=True)
+    get_index().update(COMMENT, [(pk, texts[pk]) for pk in ids])
+    bump_content_version()
+    for news_id in per_news:
+        bump_news_version(news_id)
+
+
+def moderate_comments(comment_ids):
+    """Синхронно проводит модерацию комментариев с указанными id."""
+    comments = load_pending(comment_ids)
+    apply_verdicts(comments, check_texts([text for *_, text in comments]))
+
+
+def review_comments(comment_ids, publish):
+    """
+    Решение модератора по ожидающим комментариям.
+
+    Возвращает число комментариев, которые ещё ждали модерации.
+    """
+    comments = load_pending(comment_ids)
+    apply_verdicts(
+        comments, [publish] * len(comments), reject_duplicates=False
+    )
+    return len(comments)
+
+
+class ModerationQueue:
+    """
+    Очередь комментариев, ожидающих модерации.
+
+    Фоновый поток собирает id в пачки, проверки выполняются в пуле
+    потоков или процессов, а результаты записываются общими UPDATE
+    на всю пачку. Пачка, которую не удалось обработать, возвращается
+    в очередь; после COMMENT_MODERATION_ATTEMPTS попыток её
+    комментарии остаются на модерации. Очередь живёт в памяти процесса,
+    поэтому оставшиеся без решения комментарии подбирает команда
+    moderate_pending, а вручную их проверяют в админке.
+    """
+
+    def __init__(self):
+        self.queue = Queue()
+        self.lock = Lock()
+        self.executor = None
+        self.dispatcher = None
+
+    def start(self):
+        with self.lock:
+            if self.dispatcher is not None and self.dispatcher.is_alive():
+                return
+            if self.executor is None:
+                self.executor = self.create_executor()
+            self.dispatcher = Thread(target=self.dispatch, daemon=True)
+            self.dispatcher.start()
+
+    @staticmethod
+    def create_executor():
+        workers = settings.COMMENT_MODERATION_WORKERS
+        if settings.COMMENT_MODERATION_EXECUTOR == 'process':
+            return ProcessPoolExecutor(
+                workers,
+                mp_context=get_context('spawn'),
+                initializer=django.setup,
+            )
+        return ThreadPoolExecutor(workers)
+
+    def replace_executor(self, broken):
+        """Заменяет сломанный пул, например после гибели процесса."""
+        with self.lock:
+            if self.executor is not broken:
+                return
+            self.executor = self.create_executor()
+        broken.shutdown(wait=False)
+
+    def submit(self, comment_id, attempt=1):
+        self.start()
+        self.queue.put((comment_id, attempt))
+
+    def next_batch(self):
+        batch = [self.queue.get()]
+        while len(batch) < settings.COMMENT_MODERATION_BATCH_SIZE:
+            try:
+                batch.append(
+                    self.queue.get(
+                        timeout=settings.COMMENT_MODERATION_BATCH_WAIT
+                    )
+                )
+            except Empty:
+                break
+        return batch
+
+    def dispatch(self):
+        while True:
+            batch = self.next_batch()
+            try:
+                self.check(batch)
+            except Exception:
+                self.retry(batch)
+
+    def check(self, batch):
+        try:
+            comments = load_pending([comment_id for comment_id, _ in batch])
+        finally:
+            close_old_connections()
+        if not comments:
+            return
+        executor = self.executor
+        try:
+            future = executor.submit(
+                check_texts, [text for *_, text in comments]
+            )
+        except BrokenExecutor:
+            self.replace_executor(executor)
+            raise
+        future.add_done_callback(
+            lambda done: self.finish(batch, comments, executor, done)
+        )
+
+    def finish(self, batch, comments, executor, future):
+        try:
+            apply_verdicts(comments, future.result())
+        except BrokenExecutor:
+            self.replace_executor(executor)
+            self.retry(batch)
+        except Exception:
+            self.retry(batch)
+        finally:
+            close_old_connections()
+
+    def retry(self, batch):
+        """Возвращает пачку в очередь; вызывается при обработке ошибки."""
+        again = [(pk, attempt + 1) for pk, attempt in batch
+                 if attempt < settings.COMMENT_MODERATION_ATTEMPTS]
+        given_up = [pk for pk, attempt in batch
+                    if attempt >= settings.COMMENT_MODERATION_ATTEMPTS]
+        logger.exception(
+            'Не удалось провести модерацию комментариев; '
+            'повторяем: %s, остаются на модерации: %s.',
+            [pk for pk, _ in again], given_up,
+        )
+        for item in again:
+            self.queue.put(item)
+
+
+moderation_queue = ModerationQueue()
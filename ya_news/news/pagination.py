@@ -0,0 +1,51 @@
+from django.db.models import Q
+
+CURSOR_SEPARATOR = '_'
+
+
+def encode_cursor(value, pk):
+    """Курсор следующей страницы: значение поля сортировки и id."""
+    return f'{value.isoformat()}{CURSOR_SEPARATOR}{pk}'
+
+
+def decode_cursor(cursor, parse):
+    """
+    Разбирает курсор, полученный от encode_cursor.
+
+    Для пустого курсора возвращает None, для испорченного —
+    выбрасывает ValueError.
+    """
+    if not cursor:
+        return None
+    raw_value, _, raw_pk = cursor.rpartition(CURSOR_SEPARATOR)
+    value = parse(raw_value)
+    if value is None or not raw_pk.isdigit():
+        raise ValueError(f'Некорректный курсор: {cursor}')
+    return value, int(raw_pk)
+
+
+def keyset_page(queryset, field, cursor, size, descending=False):
+    """
+    Страница объектов, упорядоченных по паре (field, id).
+
+    Вместо OFFSET продолжаем с места, где закончилась прошлая страница,
+    поэтому любая страница стоит столько же, сколько первая.
+    Возвращает список объектов и курсор следующей страницы (или None).
+    """
+    prefix, lookup = ('-', 'lt') if descending else ('', 'gt')
+    queryset = queryset.order_by(f'{prefix}{field}', f'{prefix}pk')
+    if cursor is not None:
+        value, pk = cursor
+        # Условие на само поле задаёт границу диапазона по индексу,
+        # второе отсекает уже показанные записи с тем же значением.
+        queryset = queryset.filter(
+            Q(**{f'{field}__{lookup}e': value}),
+            Q(**{f'{field}__{lookup}': value}) | Q(**{f'pk__{lookup}': pk}),
+        )
+    objects = list(queryset[:size + 1])
+    next_cursor = None
+    if len(objects) > size:
+        objects = objects[:size]
+        last = objects[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return objects, next_cursor
@@ -0,0 +1,137 @@
+import os
+import re
+from threading import Lock
+
+TERMINAL = ''
+
+
+def _build_trie(words):
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            if TERMINAL in node:
+                # Более короткое слово уже находит любое продолжение.
+                break
+            node = node.setdefault(char, {})
+        else:
+            node.clear()
+            node[TERMINAL] = True
+    return trie
+
+
+class AhoCorasickMatcher:
+    """Автомат Ахо — Корасик: один проход по тексту для всех слов."""
+
+    def __init__(self, words):
+        self.transitions = [{}]
+        self.is_match = [False]
+        for word in words:
+            state = 0
+            for char in word:
+                next_state = self.transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions[state][char] = next_state
+                    self.transitions.append({})
+                    self.is_match.append(False)
+                state = next_state
+            self.is_match[state] = True
+        self.fail = [0] * len(self.transitions)
+        queue = list(self.transitions[0].values())
+        for state in queue:
+            for char, next_state in self.transitions[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.transitions[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.is_match[next_state] |= self.is_match[
+                    self.fail[next_state]
+                ]
+                queue.append(next_state)
+
+    def search(self, text):
+        transitions, fail = self.transitions, self.fail
+        is_match = self.is_match
+        state = 0
+        for char in text:
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            if is_match[state]:
+                return True
+        return False
+
+
+class RegexMatcher:
+    """Одно скомпилированное выражение, построенное по префиксному дереву."""
+
+    def __init__(self, words):
+        trie = _build_trie(words)
+        self.pattern = re.compile(self._to_pattern(trie)) if trie else None
+
+    def _to_pattern(self, node):
+        branches = [
+            re.escape(char) + self._to_pattern(child)
+            for char, child in sorted(node.items())
+            if char != TERMINAL
+        ]
+        if not branches:
+            return ''
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+    def search(self, text):
+        return self.pattern is not None and bool(self.pattern.search(text))
+
+
+ENGINES = {
+    'aho_corasick': AhoCorasickMatcher,
+    'regex': RegexMatcher,
+}
+
+
+def read_words(path):
+    """Слова из файла: по одному на строку, пустые строки пропускаются."""
+    with open(path, encoding='utf-8') as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+class BadWordsFilter:
+    """
+    Проверка текста на запрещённые слова.
+
+    Автомат строится один раз и перестраивается, если изменился файл
+    со словами или вызван reload().
+    """
+
+    def __init__(self, words, path=None, engine='aho_corasick'):
+        self.words = words
+        self.path = path
+        self.engine = ENGINES[engine]
+        self.mtime = None
+        self.lock = Lock()
+        self.reload()
+
+    def reload(self):
+        with self.lock:
+            words = list(self.words)
+            mtime = None
+            if self.path:
+                mtime = os.stat(self.path).st_mtime
+                words += read_words(self.path)
+            self.matcher = self.engine(
+                {word.lower() for word in words if word}
+            )
+            self.mtime = mtime
+
+    def reload_if_changed(self):
+        if self.path and os.stat(self.path).st_mtime != self.mtime:
+            self.reload()
+
+    def contains(self, text):
+        """Есть ли в тексте хотя бы одно запрещённое слово."""
+        self.reload_if_changed()
+        return self.matcher.search(text.lower())
@@ -1,8 +1,21 @@
 import pytest
 
+from http import HTTPStatus
+from io import StringIO
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.conf import settings
 
+from news import views
+from news.admin import LatestCommentsFormSet
+from news.models import Comment, News
+
 
 HOME_URL = reverse('news:home')
 # Где в этом модуле нужно использовать
@@ -57,3 +70,181 @@ def test_pages_contains_form(parametrized_client, form_on_page, detail_url):
     """
     response = parametrized_client.get(detail_url)
     assert ('form' in response.context) == form_on_page
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('news_list')
+def test_home_page_served_from_cache(client, django_assert_num_queries):
+    """Повторный запрос анонима к главной не обращается к базе."""
+    first = client.get(HOME_URL)
+    with django_assert_num_queries(0):
+        second = client.get(HOME_URL)
+    assert second.content == first.content
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('news_list')
+def test_page_cache_ignores_unused_params(client, django_assert_num_queries):
+    """Лишние параметры запроса не создают новых копий страницы."""
+    client.get(HOME_URL)
+    with django_assert_num_queries(0):
+        client.get(HOME_URL, {'x': 'случайное значение'})
+
+
+@pytest.mark.django_db
+def test_home_page_cache_invalidated_by_comment(
+        client, news, comment, django_capture_on_commit_callbacks
+):
+    """Новый комментарий сбрасывает кеш главной после фиксации."""
+    client.get(HOME_URL)
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=news, author=comment.author, text='Ещё')
+        response = client.get(HOME_URL)
+        assert 'Комментариев: 1' in response.content.decode()
+    response = client.get(HOME_URL)
+    assert 'Комментариев: 2' in response.content.decode()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('news_list')
+def test_archive_pages_cover_all_news(client, settings):
+    """Архив по курсору показывает все новости без повторов."""
+    settings.NEWS_COUNT_ON_ARCHIVE_PAGE = 3
+    seen = []
+    url = reverse('news:archive')
+    while url:
+        response = client.get(url)
+        seen.extend(news.pk for news in response.context['object_list'])
+        cursor = response.context['next_cursor']
+        url = cursor and f"{reverse('news:archive')}?cursor={cursor}"
+    assert len(seen) == len(set(seen)) == News.objects.count()
+
+
+@pytest.mark.usefixtures('comments_list')
+def test_comments_loaded_page_by_page(client, news, detail_url, settings):
+    """Комментарии сверх первой страницы подгружаются по курсору."""
+    settings.COMMENTS_COUNT_ON_PAGE = 1
+    response = client.get(detail_url)
+    first_page = [chunk.pk for chunk in response.context['comments']]
+    cursor = response.context['next_cursor']
+    assert len(first_page) == 1 and cursor
+    response = client.get(
+        reverse('news:comments', args=(news.id,)), {'cursor': cursor}
+    )
+    second_page = [chunk.pk for chunk in response.context['comments']]
+    assert response.context['next_cursor'] is None
+    assert first_page + second_page == list(
+        news.comment_set.values_list('pk', flat=True)
+    )
+
+
+def test_cached_comments_keep_owner_links(
+        author_client, admin_client, comment, detail_url, edit_url
+):
+    """Закешированные комментарии показывают ссылки только их автору."""
+    response = author_client.get(detail_url)
+    assert edit_url in response.content.decode()
+    with CaptureQueriesContext(connection) as context:
+        response = admin_client.get(detail_url)
+    assert edit_url not in response.content.decode()
+    assert comment.text in response.content.decode()
+    assert not any(
+        'news_comment' in query['sql'] for query in context.captured_queries
+    )
+
+
+def test_admin_shows_only_latest_comments(admin_client, news, author):
+    """Админка новости показывает только последние комментарии."""
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Текст {index}')
+        for index in range(LatestCommentsFormSet.max_comments + 10)
+    )
+    response = admin_client.get(
+        reverse('admin:news_news_change', args=(news.id,))
+    )
+    formset = response.context['inline_admin_formsets'][0].formset
+    assert len(formset.forms) == LatestCommentsFormSet.max_comments
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('news_list')
+def test_async_views_match_sync(rf, news):
+    """Асинхронные главная и страница новости отдают тот же контекст."""
+    request = rf.get(HOME_URL)
+    request.user = AnonymousUser()
+    response = async_to_sync(views.news_home)(request)
+    assert response.is_rendered
+    assert (
+        len(response.context_data['object_list'])
+        == settings.NEWS_COUNT_ON_HOME_PAGE
+    )
+    request = rf.get(reverse('news:detail', args=(news.id,)))
+    request.user = AnonymousUser()
+    response = async_to_sync(views.news_detail)(request, pk=news.id)
+    assert response.context_data['news'] == news
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('news_list')
+def test_home_page_not_modified(client, django_assert_num_queries):
+    """Повторный запрос главной с той же меткой получает 304."""
+    etag = client.get(HOME_URL)['ETag']
+    with django_assert_num_queries(0):
+        response = client.get(HOME_URL, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_detail_etag_changes_with_comments(
+        author_client, author, news, detail_url,
+        django_capture_on_commit_callbacks
+):
+    """Новый комментарий меняет метку ETag страницы новости."""
+    # Первый ответ выдаёт CSRF-cookie, от которой зависит метка.
+    author_client.get(detail_url)
+    etag = author_client.get(detail_url)['ETag']
+    response = author_client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=news, author=author, text='Новый')
+    response = author_client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+def test_detail_etag_changes_after_relogin(
+        django_user_model, news, detail_url
+):
+    """После повторного входа страница не отдаётся со старым CSRF-токеном."""
+    django_user_model.objects.create_user('Читатель', password='secret')
+    client = Client(enforce_csrf_checks=True)
+
+    def login():
+        client.get(reverse('users:login'))
+        client.post(reverse('users:login'), {
+            'username': 'Читатель',
+            'password': 'secret',
+            'csrfmiddlewaretoken': client.cookies['csrftoken'].value,
+        })
+
+    login()
+    client.get(detail_url)
+    etag = client.get(detail_url)['ETag']
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    client.get(reverse('users:logout'))
+    login()
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    response = client.post(detail_url, {
+        'text': 'Новый',
+        'csrfmiddlewaretoken': response.context['csrf_token'],
+    })
+    assert response.status_code == HTTPStatus.FOUND
+    assert Comment.objects.filter(news=news).exists()
+
+
+def test_all_templates_compile():
+    """Все шаблоны проекта компилируются командой check_templates."""
+    output = StringIO()
+    call_command('check_templates', stdout=output)
+    assert 'news/detail.html' in output.getvalue()
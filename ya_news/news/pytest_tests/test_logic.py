@@ -1,13 +1,27 @@
 import pytest
 
+import gzip
+import json
+import time
 from http import HTTPStatus
+from io import StringIO
 
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.core.exceptions import ObjectDoesNotExist
 from pytest_django.asserts import assertRedirects, assertFormError
 
+from news import moderation, views
+from news.cache import get_content_version, get_news_version
 from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.models import Comment, News
+from news.moderation import (
+    ModerationQueue, apply_verdicts, load_pending, moderate_comments
+)
+from news.profanity import ENGINES, BadWordsFilter
+from news.search import get_index, search_news
 
 
 @pytest.mark.django_db
@@ -102,3 +116,357 @@ def test_user_cant_use_bad_words(author_client, news):
         errors=WARNING
     )
     assert comments_count_after == comments_count_before
+
+
+def test_invalid_comment_keeps_thread(author_client, comment, detail_url):
+    """При ошибке в форме страница показывает существующие комментарии."""
+    response = author_client.post(
+        detail_url, data={'text': f'Ты {BAD_WORDS[0]}'}
+    )
+    assert [chunk.pk for chunk in response.context['comments']] == [
+        comment.pk
+    ]
+    assert comment.text in response.content.decode()
+
+
+def test_comment_count_follows_comments(
+    author_client, news, form_data, detail_url
+):
+    """Счётчик комментариев новости обновляется при создании и удалении."""
+    author_client.post(detail_url, data=form_data)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    comment = Comment.objects.get()
+    author_client.delete(reverse('news:delete', args=(comment.id,)))
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.usefixtures('comments_list')
+def test_recount_comments_command(news):
+    """Команда recount_comments восстанавливает счётчик комментариев."""
+    News.objects.update(comment_count=0)
+    version = get_content_version()
+    call_command('recount_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == Comment.objects.filter(news=news).count()
+    assert get_content_version() != version
+
+
+@pytest.mark.parametrize(
+    'url, data, expected_queries',
+    (
+        # Сессия берётся из кеша.
+        # Пользователь, новость, INSERT, счётчик комментариев.
+        (pytest.lazy_fixture('detail_url'), {'text': 'Новый'}, 4),
+        # Пользователь, комментарий с новостью, UPDATE.
+        (pytest.lazy_fixture('edit_url'), {'text': 'Обновлённый'}, 3),
+        # Пользователь, комментарий с новостью, DELETE, счётчик.
+        (pytest.lazy_fixture('delete_url'), {}, 4),
+    )
+)
+def test_comment_write_queries(
+    author_client, url, data, expected_queries, django_assert_num_queries
+):
+    """Запись комментария выполняет фиксированное число запросов."""
+    with django_assert_num_queries(expected_queries):
+        response = author_client.post(url, data=data)
+    assert response.status_code == HTTPStatus.FOUND
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_bad_words_file_reloaded(engine, tmp_path):
+    """Список запрещённых слов из файла подхватывается без перезапуска."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('Хулиган\n', encoding='utf-8')
+    bad_words = BadWordsFilter(BAD_WORDS, words_file, engine)
+    assert bad_words.contains(f'Ну ты и {BAD_WORDS[0]}')
+    assert bad_words.contains('Вот хулиган!')
+    assert not bad_words.contains('Вот грубиян!')
+    words_file.write_text('грубиян\n', encoding='utf-8')
+    bad_words.reload()
+    assert bad_words.contains('Вот грубиян!')
+    assert not bad_words.contains('Вот хулиган!')
+
+
+def test_async_moderation(author_client, news, detail_url, settings):
+    """В режиме фоновой модерации комментарий публикуется после проверки."""
+    settings.COMMENT_MODERATION_ASYNC = True
+    author_client.post(detail_url, data={'text': 'Хорошая новость'})
+    author_client.post(detail_url, data={'text': f'Ты {BAD_WORDS[0]}'})
+    assert set(Comment.objects.values_list('status', flat=True)) == {
+        Comment.Status.PENDING
+    }
+    moderate_comments(Comment.objects.values_list('pk', flat=True))
+    assert Comment.objects.get(
+        status=Comment.Status.PUBLISHED
+    ).text == 'Хорошая новость'
+    assert Comment.objects.get(
+        status=Comment.Status.REJECTED
+    ).text == f'Ты {BAD_WORDS[0]}'
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def wait_for_moderation(timeout=5):
+    deadline = time.monotonic() + timeout
+    while Comment.objects.filter(status=Comment.Status.PENDING).exists():
+        assert time.monotonic() < deadline, 'Модерация не завершилась.'
+        time.sleep(0.05)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_moderation_queue_publishes_comments(
+        author_client, news, detail_url, settings, monkeypatch
+):
+    """Комментарии проходят через очередь и пул после фиксации."""
+    settings.COMMENT_MODERATION_ASYNC = True
+    settings.COMMENT_MODERATION_EXECUTOR = 'thread'
+    settings.COMMENT_MODERATION_BATCH_WAIT = 0.01
+    monkeypatch.setattr(views, 'moderation_queue', ModerationQueue())
+    author_client.post(detail_url, data={'text': 'Хорошая новость'})
+    author_client.post(detail_url, data={'text': f'Ты {BAD_WORDS[0]}'})
+    wait_for_moderation()
+    assert Comment.objects.get(
+        status=Comment.Status.PUBLISHED
+    ).text == 'Хорошая новость'
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_moderation_queue_retries_failed_batch(
+        author, news, settings, monkeypatch
+):
+    """Ошибка при обработке пачки не останавливает очередь."""
+    settings.COMMENT_MODERATION_EXECUTOR = 'thread'
+    settings.COMMENT_MODERATION_BATCH_WAIT = 0.01
+    calls = []
+
+    def flaky_load_pending(comment_ids):
+        calls.append(comment_ids)
+        if len(calls) == 1:
+            raise RuntimeError('База недоступна')
+        return load_pending(comment_ids)
+
+    monkeypatch.setattr(moderation, 'load_pending', flaky_load_pending)
+    comment = Comment.objects.create(
+        news=news, author=author, text='Текст',
+        status=Comment.Status.PENDING,
+    )
+    ModerationQueue().submit(comment.pk)
+    wait_for_moderation()
+    assert len(calls) == 2
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def test_deleted_pending_comment_not_counted(author, news):
+    """Удалённый во время проверки комментарий не попадает в счётчик."""
+    comment = Comment.objects.create(
+        news=news, author=author, text='Текст',
+        status=Comment.Status.PENDING,
+    )
+    comments = load_pending([comment.pk])
+    comment.delete()
+    apply_verdicts(comments, [True])
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_moderate_pending_command(author, news):
+    """Команда moderate_pending проверяет оставшиеся в очереди комментарии."""
+    for text in ('Хорошая новость', f'Ты {BAD_WORDS[0]}'):
+        Comment.objects.create(
+            news=news, author=author, text=text,
+            status=Comment.Status.PENDING,
+        )
+    call_command('moderate_pending', batch_size=1, stdout=StringIO())
+    assert not Comment.objects.filter(status=Comment.Status.PENDING)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.parametrize(
+    'action, status, comment_count',
+    (
+        ('publish', Comment.Status.PUBLISHED, 1),
+        ('reject', Comment.Status.REJECTED, 0),
+    )
+)
+def test_admin_reviews_pending_comment(
+        admin_client, author, news, action, status, comment_count
+):
+    """Модератор публикует или отклоняет комментарий действием админки."""
+    comment = Comment.objects.create(
+        news=news, author=author, text=f'Ты {BAD_WORDS[0]}',
+        status=Comment.Status.PENDING,
+    )
+    admin_client.post(reverse('admin:news_comment_changelist'), {
+        'action': action, '_selected_action': [comment.pk],
+    })
+    comment.refresh_from_db()
+    assert comment.status == status
+    news.refresh_from_db()
+    assert news.comment_count == comment_count
+
+
+@pytest.mark.django_db
+def test_search_finds_news_by_word_forms(
+        client, author, django_capture_on_commit_callbacks
+):
+    """Поиск находит новость по другой форме слова и по комментарию."""
+    with django_capture_on_commit_callbacks(execute=True):
+        news = News.objects.create(
+            title='Выборы мэра', text='Горожане голосуют.'
+        )
+        other = News.objects.create(title='Погода', text='Ожидаются дожди.')
+        Comment.objects.create(
+            news=other, author=author, text='Снова выборов нет'
+        )
+    response = client.get(reverse('news:search'), {'q': 'выборами'})
+    assert set(response.context['object_list']) == {news, other}
+    response = client.get(reverse('news:search'), {'q': 'голосуют выборы'})
+    assert list(response.context['object_list']) == [news]
+
+
+@pytest.mark.django_db
+def test_search_index_compaction_and_rebuild(
+        author, settings, django_capture_on_commit_callbacks
+):
+    """Индекс одинаково отвечает после слияния журнала и перестроения."""
+    settings.NEWS_SEARCH_COMPACT_THRESHOLD = 3
+    settings.NEWS_SEARCH_BUFFER_SIZE = 2
+    with django_capture_on_commit_callbacks(execute=True):
+        all_news = [
+            News.objects.create(title=f'Новость {index}', text='Про котов.')
+            for index in range(5)
+        ]
+        all_news[0].delete()
+    get_index().compactor.join()
+    expected = set(all_news[1:])
+    assert set(search_news('котов', 10)) == expected
+    call_command('compact_search_index', stdout=StringIO())
+    assert set(search_news('котов', 10)) == expected
+    call_command('rebuild_search_index', stdout=StringIO())
+    assert set(search_news('кот', 10)) == expected
+
+
+@pytest.mark.django_db
+def test_search_index_write_does_not_compact(
+        settings, django_capture_on_commit_callbacks
+):
+    """Запись в индекс только дописывает журнал."""
+    settings.NEWS_SEARCH_COMPACT_THRESHOLD = 1
+    settings.NEWS_SEARCH_BACKGROUND_COMPACT = False
+    with django_capture_on_commit_callbacks(execute=True):
+        news = News.objects.create(title='Новость', text='Про котов.')
+    index = get_index()
+    assert index.generation is None
+    assert index.compactor is None
+    call_command('compact_search_index', stdout=StringIO())
+    assert index.generation is not None
+    assert not index.delta
+    assert search_news('котов', 10) == [news]
+
+
+@pytest.mark.django_db
+def test_rolled_back_news_not_indexed(django_capture_on_commit_callbacks):
+    """Откаченное изменение новости не попадает в поисковый индекс."""
+    with django_capture_on_commit_callbacks(execute=True):
+        news = News.objects.create(title='Новость', text='Про котов.')
+        with pytest.raises(RuntimeError), transaction.atomic():
+            news.text = 'Про собак.'
+            news.save()
+            raise RuntimeError
+    assert search_news('котов', 10) == [news]
+    assert search_news('собак', 10) == []
+
+
+@pytest.mark.django_db
+def test_load_news_streams_fixture(author, tmp_path):
+    """Команда load_news загружает новости и комментарии пачками."""
+    fixture = tmp_path / 'news.json'
+    fixture.write_text(json.dumps([
+        {
+            'model': 'news.news',
+            'pk': index,
+            'fields': {'title': f'Новость {index}', 'text': 'Текст'},
+        }
+        for index in range(1, 4)
+    ] + [{
+        'model': 'news.comment',
+        'fields': {
+            'news': 1,
+            'author': author.pk,
+            'text': 'Комментарий',
+            'created': '2022-11-01T10:00:00Z',
+        },
+    }]), encoding='utf-8')
+    call_command(
+        'load_news', str(fixture), batch_size=2, stdout=StringIO()
+    )
+    assert News.objects.count() == 3
+    comment = Comment.objects.get()
+    assert comment.created.year == 2022
+    assert comment.news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_load_news_bumps_existing_news_version(author, news, tmp_path):
+    """Комментарии, загруженные к существующей новости, меняют её версию."""
+    fixture = tmp_path / 'comments.json'
+    fixture.write_text(json.dumps([{
+        'model': 'news.comment',
+        'fields': {
+            'news': news.pk,
+            'author': author.pk,
+            'text': 'Ещё',
+            'created': '2022-11-01T10:00:00Z',
+        },
+    }]), encoding='utf-8')
+    version = get_news_version(news.pk)
+    call_command(
+        'load_news', str(fixture), no_reindex=True, stdout=StringIO()
+    )
+    assert get_news_version(news.pk) != version
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('comment')
+def test_staff_can_export_news(admin_client, news):
+    """Сотрудник выгружает новости с комментариями в JSONL и CSV."""
+    url = reverse('news:export')
+    response = admin_client.get(url)
+    rows = [
+        json.loads(line)
+        for line in b''.join(response.streaming_content).splitlines()
+    ]
+    assert [row['id'] for row in rows] == [news.id]
+    assert [c['text'] for c in rows[0]['comments']] == ['Текст комментария']
+    response = admin_client.get(url, {'format': 'csv', 'gzip': ''})
+    content = gzip.decompress(b''.join(response.streaming_content))
+    assert len(content.decode().splitlines()) == 2
+
+
+def test_export_forbidden_for_regular_user(author_client):
+    """Обычному пользователю выгрузка недоступна."""
+    response = author_client.get(reverse('news:export'))
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_reads_go_to_replica_until_user_writes(
+        settings, author_client, detail_url, form_data
+):
+    """Чтение идёт с реплики, пока пользователь ничего не записал."""
+    settings.NEWS_REPLICA_DATABASE = 'replica'
+    replica = connections['replica']
+    with CaptureQueriesContext(replica) as context:
+        author_client.get(reverse('news:home'))
+    assert context.captured_queries
+    author_client.post(detail_url, data=form_data)
+    assert settings.NEWS_REPLICA_STICKY_COOKIE in author_client.cookies
+    with CaptureQueriesContext(replica) as context:
+        author_client.get(detail_url)
+    assert not context.captured_queries
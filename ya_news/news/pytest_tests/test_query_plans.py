@@ -0,0 +1,44 @@
+import re
+
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# «SCAN таблица» без индекса — полный проход по таблице.
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+def full_scans(queries):
+    """Запросы, план которых содержит полный проход по таблице."""
+    found = []
+    with connection.cursor() as cursor:
+        for query in queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            for row in cursor.fetchall():
+                if FULL_SCAN.match(row[-1]):
+                    found.append((row[-1], sql))
+    return found
+
+
+@pytest.mark.usefixtures('comment')
+@pytest.mark.parametrize(
+    'name, args',
+    (
+        ('news:home', None),
+        ('news:archive', None),
+        ('news:detail', pytest.lazy_fixture('news_id_for_args')),
+        ('news:comments', pytest.lazy_fixture('news_id_for_args')),
+        ('news:edit', pytest.lazy_fixture('comment_id_for_args')),
+        ('news:delete', pytest.lazy_fixture('comment_id_for_args')),
+    )
+)
+def test_views_use_indexes(author_client, name, args):
+    """Запросы страниц новостей не сканируют таблицы целиком."""
+    with CaptureQueriesContext(connection) as context:
+        author_client.get(reverse(name, args=args))
+    assert full_scans(context.captured_queries) == []
@@ -0,0 +1,31 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Включается на время безопасных запросов, см. news/middleware.py.
+read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+class ReadReplicaRouter:
+    """
+    Чтение внутри безопасных запросов идёт в реплику, запись — в основную базу.
+
+    Реплика открыта только на чтение, поэтому читатели не ждут
+    блокировку писателя.
+    """
+
+    def db_for_read(self, model, **hints):
+        if read_from_replica.get():
+            return settings.NEWS_REPLICA_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == settings.NEWS_REPLICA_DATABASE:
+            return False
+        return None
@@ -0,0 +1,479 @@
+"""
+Полнотекстовый поиск по новостям и комментариям.
+
+Индекс хранится в каталоге settings.NEWS_SEARCH_INDEX_DIR:
+
+* ``<поколение>.lex`` — словарь: терм -> [смещение, количество];
+* ``<поколение>.bin`` — отсортированные номера документов (uint64),
+  файл отображается в память через mmap;
+* ``CURRENT`` — номер действующего поколения;
+* ``journal.jsonl`` — журнал изменений поверх сегмента: каждая строка
+  хранит полный набор термов документа или null для удалённого.
+
+Изменения из сигналов дописываются в журнал; когда он разрастается,
+журнал и сегмент сливаются в новое поколение в фоновом потоке или
+командой compact_search_index.
+"""
+import json
+import mmap
+import os
+import re
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from heapq import merge
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Lock, RLock, Thread
+
+from django.conf import settings
+
+from .models import Comment, News
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import snowballstemmer
+except ImportError:
+    snowballstemmer = None
+
+NEWS, COMMENT = 0, 1
+POSTING_TYPE = 'Q'
+WORD_RE = re.compile(r'\w+')
+MIN_WORD_LENGTH = 2
+MIN_STEM_LENGTH = 3
+# Окончания для упрощённого стемминга, если snowballstemmer не установлен.
+ENDINGS = sorted(
+    (
+        'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'иях',
+        'ях', 'ах', 'ов', 'ев', 'ей', 'ий', 'ый', 'ой', 'ая', 'яя', 'ое',
+        'ее', 'ую', 'юю', 'ом', 'ем', 'ам', 'ям', 'ть', 'а', 'я', 'о',
+        'е', 'ы', 'и', 'у', 'ю', 'ь',
+    ),
+    key=len,
+    reverse=True,
+)
+
+stem_lock = Lock()
+if snowballstemmer is not None:
+    stemmer = snowballstemmer.stemmer('russian')
+else:
+    stemmer = None
+
+
+def light_stem(word):
+    for ending in ENDINGS:
+        stem_length = len(word) - len(ending)
+        if word.endswith(ending) and stem_length >= MIN_STEM_LENGTH:
+            return word[:stem_length]
+    return word
+
+
+@lru_cache(maxsize=100_000)
+def stem(word):
+    if stemmer is None:
+        return light_stem(word)
+    # Объект стеммера хранит состояние и не годится для нескольких потоков.
+    with stem_lock:
+        return stemmer.stemWord(word)
+
+
+def tokenize(text):
+    """Множество основ слов текста."""
+    words = WORD_RE.findall(text.lower().replace('ё', 'е'))
+    return {stem(word) for word in words if len(word) >= MIN_WORD_LENGTH}
+
+
+def make_doc_id(kind, pk):
+    return pk * 2 + kind
+
+
+def split_doc_id(doc):
+    return doc % 2, doc // 2
+
+
+class Segment:
+    """Неизменяемая часть индекса."""
+
+    def __init__(self, directory, generation):
+        self.lexicon = {}
+        self.mmap = None
+        self.postings = ()
+        if generation is None:
+            return
+        with open(directory / f'{generation}.lex', encoding='utf-8') as file:
+            self.lexicon = json.load(file)
+        with open(directory / f'{generation}.bin', 'rb') as file:
+            if os.fstat(file.fileno()).st_size:
+                self.mmap = mmap.mmap(
+                    file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+                self.postings = memoryview(self.mmap).cast(POSTING_TYPE)
+
+    def count(self, term):
+        return self.lexicon.get(term, (0, 0))[1]
+
+    def docs(self, term):
+        offset, count = self.lexicon.get(term, (0, 0))
+        return self.postings[offset:offset + count]
+
+    def contains(self, term, doc):
+        docs = self.docs(term)
+        position = bisect_left(docs, doc)
+        return position < len(docs) and docs[position] == doc
+
+    def close(self):
+        if self.mmap is not None:
+            self.postings.release()
+            self.mmap.close()
+
+
+class SegmentWriter:
+    """
+    Записывает новый сегмент, держа в памяти не больше buffer_size пар.
+
+    Когда буфер заполняется, он сбрасывается на диск отсортированным
+    прогоном; в конце прогоны сливаются в один сегмент.
+    """
+
+    def __init__(self, directory, generation, buffer_size):
+        self.directory = directory
+        self.generation = generation
+        self.buffer_size = buffer_size
+        self.buffer = defaultdict(list)
+        self.buffered = 0
+        self.runs_dir = TemporaryDirectory(dir=directory)
+        self.runs = []
+
+    def add(self, term, docs):
+        self.buffer[term].extend(docs)
+        self.buffered += len(docs)
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        path = Path(self.runs_dir.name) / f'{len(self.runs)}.run'
+        with open(path, 'w', encoding='utf-8') as file:
+            for term in sorted(self.buffer):
+                docs = ','.join(map(str, sorted(self.buffer[term])))
+                file.write(f'{term}\t{docs}\n')
+        self.runs.append(path)
+        self.buffer.clear()
+        self.buffered = 0
+
+    @staticmethod
+    def read_run(path):
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                term, docs = line.rstrip('\n').split('\t')
+                yield term, docs
+
+    def finish(self):
+        self.flush()
+        lexicon = {}
+        offset = 0
+        runs = [self.read_run(path) for path in self.runs]
+        postings_path = self.directory / f'{self.generation}.bin'
+        with open(postings_path, 'wb') as postings:
+            for term, group in groupby(
+                merge(*runs, key=itemgetter(0)), key=itemgetter(0)
+            ):
+                docs = array(POSTING_TYPE, sorted({
+                    int(doc)
+                    for _, chunk in group
+                    for doc in chunk.split(',')
+                    if doc
+                }))
+                if not docs:
+                    continue
+                docs.tofile(postings)
+                lexicon[term] = [offset, len(docs)]
+                offset += len(docs)
+        with open(
+            self.directory / f'{self.generation}.lex', 'w', encoding='utf-8'
+        ) as file:
+            json.dump(lexicon, file, ensure_ascii=False)
+        self.runs_dir.cleanup()
+
+
+class NewsSearchIndex:
+    """Инвертированный индекс: сегмент на диске и журнал изменений."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.current_path = self.directory / 'CURRENT'
+        self.journal_path = self.directory / 'journal.jsonl'
+        self.lock_path = self.directory / 'LOCK'
+        self.lock = RLock()
+        self.compactor = None
+        self.generation = None
+        self.segment = Segment(self.directory, None)
+        self.journal_offset = 0
+        self.delta = {}
+        self.delta_postings = defaultdict(set)
+        with self.locked(exclusive=False):
+            self.refresh()
+
+    @contextmanager
+    def locked(self, exclusive=True):
+        """Блокировка и внутри процесса, и между процессами."""
+        with self.lock, open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(
+                    lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+                )
+            yield
+
+    def read_generation(self):
+        try:
+            return int(self.current_path.read_text())
+        except FileNotFoundError:
+            return None
+
+    def refresh(self):
+        """Подхватывает новое поколение и непрочитанные строки журнала."""
+        generation = self.read_generation()
+        if generation != self.generation:
+            self.segment.close()
+            self.segment = Segment(self.directory, generation)
+            self.generation = generation
+            self.journal_offset = 0
+            self.delta.clear()
+            self.delta_postings.clear()
+        try:
+            with open(self.journal_path, 'rb') as journal:
+                journal.seek(self.journal_offset)
+                data = journal.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            entry = json.loads(line)
+            self.apply(entry['doc'], entry['terms'])
+        self.journal_offset += end
+
+    def apply(self, doc, terms):
+        for term in self.delta.get(doc) or ():
+            self.delta_postings[term].discard(doc)
+        self.delta[doc] = terms
+        for term in terms or ():
+            self.delta_postings[term].add(doc)
+
+    def write(self, entries):
+        lines = b''.join(
+            json.dumps(
+                {
+                    'doc': doc,
+                    'terms': None if terms is None else sorted(terms),
+                },
+                ensure_ascii=False,
+            ).encode() + b'\n'
+            for doc, terms in entries
+        )
+        if not lines:
+            return
+        with self.locked():
+            with open(self.journal_path, 'ab') as journal:
+                journal.write(lines)
+            self.refresh()
+            backlog = len(self.delta)
+        if backlog >= settings.NEWS_SEARCH_COMPACT_THRESHOLD:
+            self.compact_in_background()
+
+    def update(self, kind, items):
+        """Индексирует документы: items — пары (pk, текст)."""
+        self.write(
+            (make_doc_id(kind, pk), tokenize(text)) for pk, text in items
+        )
+
+    def delete(self, kind, pks):
+        self.write((make_doc_id(kind, pk), None) for pk in pks)
+
+    def term_docs(self, term):
+        """Документы с термом с учётом журнала."""
+        docs = {
+            doc for doc in self.segment.docs(term) if doc not in self.delta
+        }
+        return docs | self.delta_postings.get(term, set())
+
+    def term_count(self, term):
+        return self.segment.count(term) + len(
+            self.delta_postings.get(term, ())
+        )
+
+    def has_term(self, doc, term):
+        if doc in self.delta:
+            return doc in self.delta_postings.get(term, ())
+        return self.segment.contains(term, doc)
+
+    def search(self, query):
+        """Номера документов, содержащих все слова запроса."""
+        terms = tokenize(query)
+        if not terms:
+            return set()
+        with self.locked(exclusive=False):
+            self.refresh()
+            # Начинаем с самого редкого терма, остальные лишь проверяем.
+            terms = sorted(terms, key=self.term_count)
+            docs = self.term_docs(terms[0])
+            for term in terms[1:]:
+                docs = {doc for doc in docs if self.has_term(doc, term)}
+        return docs
+
+    def next_generation(self):
+        return max((self.generation or 0) + 1, time.time_ns() // 1000)
+
+    def switch(self, generation, journal_tail):
+        """
+        Делает поколение действующим.
+
+        Строки журнала, начиная со смещения journal_tail, сохраняются;
+        при journal_tail=None журнал очищается.
+        """
+        temporary = self.directory / 'CURRENT.tmp'
+        temporary.write_text(str(generation))
+        os.replace(temporary, self.current_path)
+        tail = b''
+        if journal_tail is not None and self.journal_path.exists():
+            with open(self.journal_path, 'rb') as journal:
+                journal.seek(journal_tail)
+                tail = journal.read()
+        temporary = self.directory / 'journal.tmp'
+        temporary.write_bytes(tail)
+        os.replace(temporary, self.journal_path)
+        previous = self.generation
+        self.refresh()
+        if previous is not None:
+            for suffix in ('lex', 'bin'):
+                (self.directory / f'{previous}.{suffix}').unlink(
+                    missing_ok=True
+                )
+
+    def compact_in_background(self):
+        """Запускает слияние в отдельном потоке, если оно ещё не идёт."""
+        if not settings.NEWS_SEARCH_BACKGROUND_COMPACT:
+            return
+        with self.lock:
+            if self.compactor is not None and self.compactor.is_alive():
+                return
+            self.compactor = Thread(target=self.compact, daemon=True)
+            self.compactor.start()
+
+    def compact(self):
+        """
+        Сливает журнал и сегмент в новое поколение.
+
+        Новый сегмент строится по снимку индекса без блокировки, поэтому
+        запись и поиск его не ждут; строки журнала, дописанные за это
+        время, остаются поверх нового сегмента. Возвращает False, если
+        индекс успели слить или перестроить в другом месте.
+        """
+        with self.locked():
+            self.refresh()
+            start_generation = self.generation
+            start_offset = self.journal_offset
+            segment = Segment(self.directory, start_generation)
+            delta = dict(self.delta)
+        delta_postings = defaultdict(set)
+        for doc, terms in delta.items():
+            for term in terms or ():
+                delta_postings[term].add(doc)
+        generation = self.next_generation()
+        writer = SegmentWriter(
+            self.directory, generation, settings.NEWS_SEARCH_BUFFER_SIZE
+        )
+        try:
+            for term in sorted(set(segment.lexicon) | set(delta_postings)):
+                docs = {
+                    doc for doc in segment.docs(term) if doc not in delta
+                }
+                writer.add(term, docs | delta_postings.get(term, set()))
+        finally:
+            segment.close()
+        writer.finish()
+        with self.locked():
+            self.refresh()
+            if self.generation != start_generation:
+                for suffix in ('lex', 'bin'):
+                    (self.directory / f'{generation}.{suffix}').unlink(
+                        missing_ok=True
+                    )
+                return False
+            self.switch(generation, journal_tail=start_offset)
+        return True
+
+    def rebuild(self, documents):
+        """
+        Строит индекс заново по потоку документов (вид, pk, текст).
+
+        Изменения, попавшие в журнал во время перестроения,
+        сохраняются поверх нового сегмента.
+        """
+        with self.locked():
+            self.refresh()
+            start_generation = self.generation
+            start_offset = self.journal_offset
+        generation = self.next_generation()
+        writer = SegmentWriter(
+            self.directory, generation, settings.NEWS_SEARCH_BUFFER_SIZE
+        )
+        count = 0
+        for kind, pk, text in documents:
+            doc = make_doc_id(kind, pk)
+            for term in tokenize(text):
+                writer.add(term, (doc,))
+            count += 1
+        writer.finish()
+        with self.locked():
+            self.refresh()
+            if self.generation != start_generation:
+                # Журнал уже слили в другое поколение — сохраняем его весь.
+                start_offset = 0
+            self.switch(generation, journal_tail=start_offset)
+        return count
+
+
+indexes = {}
+indexes_lock = Lock()
+
+
+def get_index():
+    directory = str(settings.NEWS_SEARCH_INDEX_DIR)
+    with indexes_lock:
+        if directory not in indexes:
+            indexes[directory] = NewsSearchIndex(directory)
+        return indexes[directory]
+
+
+def news_text(news):
+    return f'{news.title}\n{news.text}'
+
+
+def search_news(query, limit):
+    """Новости, в тексте или комментариях которых есть все слова запроса."""
+    docs = sorted(get_index().search(query), reverse=True)
+    docs = docs[:settings.NEWS_SEARCH_MAX_CANDIDATES]
+    news_ids = set()
+    comment_ids = []
+    for doc in docs:
+        kind, pk = split_doc_id(doc)
+        if kind == NEWS:
+            news_ids.add(pk)
+        else:
+            comment_ids.append(pk)
+    if comment_ids:
+        news_ids.update(Comment.objects.filter(
+            pk__in=comment_ids, status=Comment.Status.PUBLISHED
+        ).values_list('news_id', flat=True))
+    return list(News.objects.filter(pk__in=news_ids)[:limit])
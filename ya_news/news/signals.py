@@ -0,0 +1,89 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_content_version, bump_news_version
+from .models import Comment, News
+from .search import COMMENT, NEWS, get_index, news_text
+
+
+@receiver(connection_created)
+def apply_pragmas(sender, connection, **kwargs):
+    """Настраивает новое соединение SQLite по DATABASES[...]['PRAGMAS']."""
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in connection.settings_dict.get('PRAGMAS', {}).items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(post_save, sender=Comment)
+def increase_comment_count(sender, instance, created, **kwargs):
+    """Учитываем новый опубликованный комментарий в счётчике новости."""
+    if created and instance.status == Comment.Status.PUBLISHED:
+        News.objects.filter(pk=instance.news_id).update(
+            comment_count=F('comment_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def decrease_comment_count(sender, instance, **kwargs):
+    """Убираем удалённый опубликованный комментарий из счётчика новости."""
+    if instance.status != Comment.Status.PUBLISHED:
+        return
+    News.objects.filter(
+        pk=instance.news_id, comment_count__gt=0
+    ).update(comment_count=F('comment_count') - 1)
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_pages(sender, instance, **kwargs):
+    """
+    Любое изменение новостей или комментариев сбрасывает кеш страниц.
+
+    Версии меняются после фиксации транзакции: иначе параллельный
+    запрос успеет сохранить под новой версией ещё старые данные.
+    """
+    news_id = instance.pk if sender is News else instance.news_id
+
+    def bump_versions():
+        bump_content_version()
+        bump_news_version(news_id)
+
+    transaction.on_commit(bump_versions)
+
+
+# Индекс меняется после фиксации, чтобы откаченная транзакция
+# не оставила в нём термов несохранённого текста.
+
+
+@receiver(post_save, sender=News)
+def index_news(sender, instance, **kwargs):
+    items = [(instance.pk, news_text(instance))]
+    transaction.on_commit(lambda: get_index().update(NEWS, items))
+
+
+@receiver(post_delete, sender=News)
+def unindex_news(sender, instance, **kwargs):
+    pks = [instance.pk]
+    transaction.on_commit(lambda: get_index().delete(NEWS, pks))
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    """В поиск попадают только опубликованные комментарии."""
+    if instance.status == Comment.Status.PUBLISHED:
+        items = [(instance.pk, instance.text)]
+        transaction.on_commit(lambda: get_index().update(COMMENT, items))
+    else:
+        unindex_comment(sender, instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    pks = [instance.pk]
+    transaction.on_commit(lambda: get_index().delete(COMMENT, pks))
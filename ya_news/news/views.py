@@ -1,14 +1,142 @@
+import asyncio
+import contextvars
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from hashlib import md5
+from urllib.parse import urlencode
+
 from django.conf import settings
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import (
+    LoginRequiredMixin, UserPassesTestMixin
+)
+from django.db import close_old_connections, transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
-from .forms import CommentForm
+from .cache import (
+    comments_cache_key, count_hit, count_miss, get_content_version,
+    get_news_version, get_page_cache, page_cache_key
+)
+from .export import CONTENT_TYPES, FORMATS, export_news
+from .forms import CommentForm, PendingCommentForm
 from .models import Comment, News
+from .moderation import moderation_queue
+from .pagination import decode_cursor, keyset_page
+from .search import search_news
+
+
+def get_comments_page(news_id, cursor=None):
+    """Страница комментариев к новости и курсор следующей страницы."""
+    return keyset_page(
+        Comment.objects.filter(
+            news_id=news_id, status=Comment.Status.PUBLISHED
+        ).select_related('author'),
+        'created',
+        cursor,
+        settings.COMMENTS_COUNT_ON_PAGE,
+    )
+
+
+CommentChunk = namedtuple('CommentChunk', 'pk author_id html')
+
+
+def get_comment_chunks(news_id, cursor=None):
+    """
+    Страница комментариев в виде готовых HTML-фрагментов.
+
+    Фрагменты не зависят от пользователя и кешируются по версии новости
+    и курсору, а ссылки автора шаблон добавляет по author_id.
+    """
+    page_cache = get_page_cache()
+    key = comments_cache_key(news_id, cursor)
+    page = page_cache.get(key)
+    if page is None:
+        comments, next_cursor = get_comments_page(
+            news_id, decode_cursor(cursor, parse_datetime)
+        )
+        chunks = [
+            CommentChunk(
+                comment.pk,
+                comment.author_id,
+                render_to_string(
+                    'news/includes/comment.html', {'comment': comment}
+                ),
+            )
+            for comment in comments
+        ]
+        page = chunks, next_cursor
+        page_cache.set(key, page, settings.NEWS_PAGE_CACHE_TIMEOUT)
+    return page
+
+
+def home_etag(request, *args, **kwargs):
+    """
+    Метка ETag главной: версия содержимого и пользователь.
+
+    Считается без запросов к базе, поэтому ответ 304 отдаётся
+    до выборки новостей и отрисовки шаблона.
+    """
+    return f'{get_content_version()}-{request.user.pk or 0}'
+
+
+def detail_etag(request, pk, *args, **kwargs):
+    """
+    Метка ETag страницы новости: её версия и пользователь.
+
+    Авторизованному пользователю страница отдаётся с формой и
+    CSRF-токеном, который меняется при каждом входе, поэтому в метку
+    входит и хеш токена.
+    """
+    etag = f'{get_news_version(pk)}-{request.user.pk or 0}'
+    if request.user.is_authenticated:
+        csrf_token = request.META.get('CSRF_COOKIE', '')
+        etag += '-' + md5(csrf_token.encode()).hexdigest()[:16]
+    return etag
+
+
+class CachedPageMixin:
+    """Отдаёт анонимным пользователям сохранённую копию страницы."""
+    # Параметры запроса, от которых зависит страница; остальные
+    # не должны плодить копии в кеше.
+    cache_params = ()
+
+    def get_cache_path(self):
+        params = [
+            (name, self.request.GET[name])
+            for name in self.cache_params if name in self.request.GET
+        ]
+        if not params:
+            return self.request.path
+        return f'{self.request.path}?{urlencode(params)}'
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        page_cache = get_page_cache()
+        key = page_cache_key(self.get_cache_path())
+        content = page_cache.get(key)
+        if content is not None:
+            count_hit()
+            return HttpResponse(content)
+        count_miss()
+        response = super().get(request, *args, **kwargs)
+        response.add_post_render_callback(
+            lambda rendered: page_cache.set(
+                key, rendered.content, settings.NEWS_PAGE_CACHE_TIMEOUT
+            )
+        )
+        return response
 
 
-class NewsList(generic.ListView):
+@method_decorator(condition(etag_func=home_etag), name='dispatch')
+class NewsList(CachedPageMixin, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
@@ -19,29 +147,89 @@ class NewsList(generic.ListView):
 
         Их количество определяется в настройках проекта.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+
+class NewsArchive(CachedPageMixin, generic.ListView):
+    """Архив новостей с постраничной навигацией по курсору."""
+    model = News
+    template_name = 'news/archive.html'
+    cache_params = ('cursor',)
+
+    def get_queryset(self):
+        try:
+            cursor = decode_cursor(self.request.GET.get('cursor'), parse_date)
+        except ValueError:
+            raise Http404('Страница архива не найдена.')
+        news, self.next_cursor = keyset_page(
+            self.model.objects.all(),
+            'date',
+            cursor,
+            settings.NEWS_COUNT_ON_ARCHIVE_PAGE,
+            descending=True,
+        )
+        return news
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.next_cursor
+        return context
+
+
+class NewsSearch(generic.ListView):
+    """Поиск по новостям и комментариям к ним."""
+    template_name = 'news/search.html'
+
+    def get_queryset(self):
+        return search_news(
+            self.request.GET.get('q', ''), settings.NEWS_SEARCH_RESULTS
+        )
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
 
+
+@method_decorator(condition(etag_func=detail_etag), name='dispatch')
 class NewsDetail(generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context['comments'], context['next_cursor'] = get_comment_chunks(
+            self.object.pk
+        )
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
+class NewsComments(generic.ListView):
+    """Следующая страница комментариев к новости в виде HTML-фрагмента."""
+    template_name = 'news/includes/comments.html'
+    context_object_name = 'comments'
+
+    def get_queryset(self):
+        try:
+            comments, self.next_cursor = get_comment_chunks(
+                self.kwargs['pk'], self.request.GET.get('cursor')
+            )
+        except ValueError:
+            raise Http404('Страница комментариев не найдена.')
+        return comments
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['news_id'] = self.kwargs['pk']
+        context['next_cursor'] = self.next_cursor
+        return context
+
+
 class NewsComment(
         LoginRequiredMixin,
         generic.detail.SingleObjectMixin,
@@ -51,31 +239,87 @@ class NewsComment(
     form_class = CommentForm
     template_name = 'news/detail.html'
 
+    def get_form_class(self):
+        if settings.COMMENT_MODERATION_ASYNC:
+            return PendingCommentForm
+        return super().get_form_class()
+
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments'], context['next_cursor'] = get_comment_chunks(
+            self.object.pk
+        )
+        return context
+
     def form_valid(self, form):
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
+        if settings.COMMENT_MODERATION_ASYNC:
+            comment.status = Comment.Status.PENDING
         comment.save()
+        if settings.COMMENT_MODERATION_ASYNC:
+            transaction.on_commit(
+                lambda: moderation_queue.submit(comment.pk)
+            )
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
+    detail_view = staticmethod(NewsDetail.as_view())
+    comment_view = staticmethod(NewsComment.as_view())
 
     def get(self, request, *args, **kwargs):
-        view = NewsDetail.as_view()
-        return view(request, *args, **kwargs)
+        return self.detail_view(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
-        view = NewsComment.as_view()
-        return view(request, *args, **kwargs)
+        return self.comment_view(request, *args, **kwargs)
+
+
+def call_view(view, request, args, kwargs):
+    """
+    Вызывает синхронное представление в потоке пула.
+
+    Шаблон отрисовывается здесь же, потому что ленивые запросы
+    выполняются при отрисовке.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def run_in_pool(view):
+    """Асинхронная обёртка, выполняющая view в ограниченном пуле потоков."""
+    async def async_view(request, *args, **kwargs):
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            read_executor,
+            context.run,
+            partial(call_view, view, request, args, kwargs),
+        )
+    return async_view
+
+
+read_executor = ThreadPoolExecutor(
+    max_workers=settings.NEWS_ASYNC_WORKERS,
+    thread_name_prefix='news-read',
+)
+news_home = run_in_pool(NewsList.as_view())
+news_detail = run_in_pool(NewsDetailView.as_view())
 
 
 class CommentBase(LoginRequiredMixin):
@@ -83,14 +327,15 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -102,3 +347,29 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+
+class NewsExport(LoginRequiredMixin, UserPassesTestMixin, generic.View):
+    """Потоковая выгрузка новостей с комментариями для сотрудников."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', 'jsonl')
+        if export_format not in FORMATS:
+            raise Http404('Неизвестный формат выгрузки.')
+        compress = 'gzip' in request.GET
+        filename = f'news.{export_format}'
+        content_type = CONTENT_TYPES[export_format]
+        if compress:
+            filename += '.gz'
+            content_type = 'application/gzip'
+        response = StreamingHttpResponse(
+            export_news(
+                export_format, settings.NEWS_EXPORT_CHUNK_SIZE, compress
+            ),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename={filename}'
+        return response
@@ -22,6 +22,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'news.middleware.ReadReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -36,7 +37,7 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
+        'APP_DIRS': False,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -44,6 +45,14 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Шаблоны разбираются один раз на процесс и при любом DEBUG;
+            # runserver сбрасывает кеш при изменении файлов.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -55,9 +64,75 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': 60,
+        # Выполняются для каждого нового соединения, см. news/signals.py.
+        'PRAGMAS': {
+            'journal_mode': 'wal',
+            'synchronous': 'normal',
+            'busy_timeout': 5000,
+            'cache_size': -20000,
+            'mmap_size': 128 * 1024 * 1024,
+        },
+    },
+    # Тот же файл только на чтение; можно указать реплицированную копию.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{BASE_DIR / "db.sqlite3"}?mode=ro',
+        'CONN_MAX_AGE': 60,
+        'PRAGMAS': {
+            'query_only': 1,
+            'busy_timeout': 5000,
+            'cache_size': -20000,
+            'mmap_size': 128 * 1024 * 1024,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
 }
 
+DATABASE_ROUTERS = ['news.routers.ReadReplicaRouter']
+
+NEWS_REPLICA_DATABASE = 'replica'
+
+NEWS_REPLICA_STICKY_COOKIE = 'use_primary'
+
+NEWS_REPLICA_STICKY_SECONDS = 10
+
+# Асинхронные главная и страница новости; включайте при запуске под ASGI.
+NEWS_ASYNC_VIEWS = False
+
+NEWS_ASYNC_WORKERS = 8
+
+# Для нескольких процессов замените locmem на общий файловый кеш:
+# 'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+# 'LOCATION': BASE_DIR / 'cache',
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Кеш сессий должен быть общим для всех процессов: иначе выход
+    # удаляет сессию только из памяти одного из них. Подойдёт и
+    # memcached или redis, но не locmem.
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'sessions',
+    },
+    # Версии страниц попадают в ETag и тоже должны быть общими.
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'versions',
+    },
+}
+
+# Сессии читаются из кеша и сохраняются ещё и в базу. Чтобы не обращаться
+# к серверу совсем, храните их в подписанной cookie:
+# SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Только общий для процессов кеш, см. CACHES['sessions'].
+SESSION_CACHE_ALIAS = 'sessions'
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -80,3 +155,38 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+NEWS_COUNT_ON_ARCHIVE_PAGE = 20
+COMMENTS_COUNT_ON_PAGE = 50
+NEWS_SEARCH_RESULTS = 20
+NEWS_EXPORT_CHUNK_SIZE = 1000
+
+# Поисковый индекс: каталог, размер журнала до слияния с сегментом,
+# размер буфера при перестроении и предел кандидатов на один запрос.
+NEWS_SEARCH_INDEX_DIR = BASE_DIR / 'search_index'
+NEWS_SEARCH_COMPACT_THRESHOLD = 10_000
+# Сливать журнал в фоновом потоке процесса; при False запускайте
+# manage.py compact_search_index по расписанию.
+NEWS_SEARCH_BACKGROUND_COMPACT = True
+NEWS_SEARCH_BUFFER_SIZE = 1_000_000
+NEWS_SEARCH_MAX_CANDIDATES = 5_000
+
+NEWS_PAGE_CACHE_ALIAS = 'default'
+# Только общий для процессов кеш, см. CACHES['versions'].
+NEWS_VERSION_CACHE_ALIAS = 'versions'
+NEWS_PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Файл с дополнительными запрещёнными словами, по одному на строку.
+BAD_WORDS_FILE = None
+# Движок проверки: 'aho_corasick' или 'regex'.
+BAD_WORDS_ENGINE = 'aho_corasick'
+
+# Фоновая модерация: новые комментарии публикуются после проверки
+# в пуле потоков ('thread') или процессов ('process').
+COMMENT_MODERATION_ASYNC = False
+COMMENT_MODERATION_EXECUTOR = 'process'
+COMMENT_MODERATION_WORKERS = None
+COMMENT_MODERATION_BATCH_SIZE = 100
+COMMENT_MODERATION_BATCH_WAIT = 0.5
+# Сколько раз обрабатывать комментарий, прежде чем оставить его
+# на ручную модерацию.
+COMMENT_MODERATION_ATTEMPTS = 3
@@ -0,0 +1,30 @@
+"""Предварительная компиляция шаблонов проекта."""
+from pathlib import Path
+from time import perf_counter
+
+from django.template import engines
+
+
+def template_names():
+    """Имена всех шаблонов из каталогов DIRS."""
+    names = []
+    for directory in engines['django'].dirs:
+        directory = Path(directory)
+        names.extend(
+            path.relative_to(directory).as_posix()
+            for path in sorted(directory.rglob('*.html'))
+        )
+    return names
+
+
+def load_template(name):
+    """Загружает шаблон и возвращает время загрузки в миллисекундах."""
+    start = perf_counter()
+    engines['django'].get_template(name)
+    return (perf_counter() - start) * 1000
+
+
+def warm_up_templates():
+    """Заполняет кеш загрузчика, чтобы первый запрос не разбирал шаблоны."""
+    for name in template_names():
+        load_template(name)
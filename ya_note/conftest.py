@@ -0,0 +1,17 @@
+import pytest
+
+from copy import deepcopy
+from django.conf import settings
+from django.test import override_settings
+
+
+@pytest.fixture(scope='session', autouse=True)
+def file_caches_in_tmp(tmp_path_factory):
+    """Файловые кеши тестов не попадают в каталог проекта."""
+    caches = deepcopy(settings.CACHES)
+    directory = tmp_path_factory.mktemp('cache')
+    for alias, options in caches.items():
+        if options['BACKEND'].endswith('.FileBasedCache'):
+            options['LOCATION'] = directory / alias
+    with override_settings(CACHES=caches):
+        yield
@@ -0,0 +1,145 @@
+import gzip
+import io
+import json
+import zlib
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import slug_re
+from django.db import IntegrityError, transaction
+
+from .models import Note
+from .slugs import allocate_slugs, slugify_title
+
+FIELDS = ('title', 'text', 'slug')
+GZIP_MAGIC = b'\x1f\x8b'
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+SAVE_ATTEMPTS = 3
+LINE_ERROR = 'Строка {}: ожидается объект с полями title и text.'
+ARCHIVE_ERROR = 'Архив повреждён или записан не в кодировке UTF-8.'
+
+
+def export_notes(author, chunk_size):
+    """
+    Заметки автора в виде gzip-сжатого JSONL.
+
+    Записи читаются с сервера курсором и сжимаются по пачкам,
+    поэтому память не зависит от числа заметок.
+    """
+    compressor = zlib.compressobj(wbits=GZIP_WBITS)
+    notes = Note.objects.filter(author=author).order_by('id').values_list(
+        *FIELDS
+    ).iterator(chunk_size=chunk_size)
+    while True:
+        rows = list(islice(notes, chunk_size))
+        if not rows:
+            break
+        lines = ''.join(
+            json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + '\n'
+            for row in rows
+        )
+        data = compressor.compress(lines.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def read_notes(file):
+    """Записи архива; сжатие gzip распознаётся по сигнатуре."""
+    try:
+        yield from parse_lines(open_archive(file))
+    except (UnicodeDecodeError, EOFError, OSError, zlib.error):
+        raise ValidationError(ARCHIVE_ERROR)
+
+
+def open_archive(file):
+    if file.read(2) == GZIP_MAGIC:
+        file.seek(0)
+        file = gzip.GzipFile(fileobj=file)
+    else:
+        file.seek(0)
+    return io.TextIOWrapper(file, encoding='utf-8')
+
+
+def parse_lines(lines):
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            title, text = record['title'], record['text']
+            slug = record.get('slug') or ''
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise ValidationError(LINE_ERROR.format(number))
+        if not all(isinstance(value, str) for value in (title, text, slug)):
+            raise ValidationError(LINE_ERROR.format(number))
+        yield title, text, slug
+
+
+def import_notes(author, file, batch_size):
+    """
+    Загружает заметки из архива пачками, все или ни одной.
+
+    Возвращает число добавленных заметок.
+    """
+    records = read_notes(file)
+    count = 0
+    with transaction.atomic():
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                return count
+            save_batch(author, batch)
+            count += len(batch)
+
+
+def save_batch(author, batch):
+    """Сохраняет пачку, повторяя её при гонке за slug."""
+    for attempt in range(1, SAVE_ATTEMPTS + 1):
+        notes = build_notes(author, batch)
+        try:
+            with transaction.atomic():
+                return Note.objects.bulk_create(notes)
+        except IntegrityError:
+            if attempt == SAVE_ATTEMPTS:
+                raise
+
+
+def build_notes(author, batch):
+    """
+    Заметки пачки с подобранными slug.
+
+    Свободные явные slug сохраняются, для остальных номера
+    подбираются по тем же правилам, что и в Note.save.
+    """
+    title_length = Note._meta.get_field('title').max_length
+    slug_length = Note._meta.get_field('slug').max_length
+    explicit = {
+        slug for _, _, slug in batch
+        if slug and len(slug) <= slug_length and slug_re.match(slug)
+    }
+    taken = set(Note.objects.filter(
+        slug__in=explicit
+    ).values_list('slug', flat=True))
+    slugs = [None] * len(batch)
+    kept = set()
+    pending = []
+    for index, (title, _, slug) in enumerate(batch):
+        if slug in explicit and slug not in taken and slug not in kept:
+            slugs[index] = slug
+            kept.add(slug)
+        else:
+            pending.append(index)
+    bases = [
+        slugify_title(batch[index][0])[:slug_length] for index in pending
+    ]
+    allocated = allocate_slugs(bases, slug_length, kept)
+    for index, slug in zip(pending, allocated):
+        slugs[index] = slug
+    return [
+        Note(
+            title=title[:title_length], text=text, slug=slug,
+            author_id=author.pk,
+        )
+        for (title, text, _), slug in zip(batch, slugs)
+    ]
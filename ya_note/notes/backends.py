@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+USER_KEY = 'notes:user:{pk}'
+
+
+def get_user_cache():
+    """Кеш с записями пользователей для авторизации запросов."""
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def forget_user(pk):
+    """Убирает пользователя из кеша после изменения или выхода."""
+    get_user_cache().delete(USER_KEY.format(pk=pk))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, который берёт пользователя запроса из кеша.
+
+    Без него каждый запрос авторизованного пользователя выполняет
+    SELECT по auth_user. Запись сбрасывается при сохранении
+    пользователя и при выходе, см. notes/signals.py. QuerySet.update()
+    сигналов не посылает: после массового изменения пользователей
+    вызовите forget_user для каждого из них.
+    """
+
+    def get_user(self, user_id):
+        user_cache = get_user_cache()
+        key = USER_KEY.format(pk=user_id)
+        user = user_cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                user_cache.set(key, user)
+        return user
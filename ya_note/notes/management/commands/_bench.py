@@ -0,0 +1,24 @@
+"""Общие помощники для команд-бенчмарков."""
+from contextlib import contextmanager
+from statistics import median
+from time import perf_counter
+
+from django.db import transaction
+
+
+@contextmanager
+def rolled_back():
+    """Выполняет блок в транзакции и откатывает её в конце."""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def measure(func, repeat=5):
+    """Медиана времени выполнения func в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        timings.append((perf_counter() - start) * 1000)
+    return median(timings)
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from notes.models import Note
+from notes.views import NotesList
+
+from ._bench import measure, rolled_back
+
+User = get_user_model()
+BATCH_SIZE = 10_000
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время выдачи первой и последней страницы списка заметок '
+        'для пользователей с разным числом заметок. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=(100, 10_000, 100_000)
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        with rolled_back():
+            self.stdout.write(
+                f'{"заметок":>10} {"первая, мс":>12} {"последняя, мс":>14}'
+            )
+            for size in options['sizes']:
+                user = User.objects.create(username=f'bench_{size}')
+                self.seed(user, size)
+                last_page = Note.objects.filter(author=user).order_by(
+                    '-id'
+                ).values_list('id', flat=True)[settings.NOTES_COUNT_ON_PAGE]
+                timings = []
+                for params in ({}, {'after': last_page}):
+                    request = factory.get('/notes/', params)
+                    request.user = user
+                    view = NotesList.as_view()
+                    timings.append(measure(
+                        lambda: view(request).render(), options['repeat']
+                    ))
+                self.stdout.write(
+                    f'{size:>10} {timings[0]:>12.2f} {timings[1]:>14.2f}'
+                )
+
+    @staticmethod
+    def seed(user, size):
+        for start in range(0, size, BATCH_SIZE):
+            Note.objects.bulk_create(
+                Note(
+                    title=f'Заметка {index}',
+                    text='Длинный текст заметки. ' * 50,
+                    slug=f'bench-{user.pk}-{index}',
+                    author=user,
+                )
+                for index in range(start, min(start + BATCH_SIZE, size))
+            )
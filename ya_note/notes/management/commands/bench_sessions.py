@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note
+
+from ._bench import measure, rolled_back
+
+User = get_user_model()
+ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'django.contrib.sessions.backends.signed_cookies',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает хранилища сессий на запросах авторизованного '
+        'пользователя к списку заметок. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        url = reverse('notes:list')
+        with rolled_back():
+            user = User.objects.create(username='bench_sessions')
+            Note.objects.create(
+                title='Заметка', text='Текст', slug='bench', author=user
+            )
+            self.stdout.write(
+                f'{"хранилище":<16} {"запросов/с":>12} {"SQL на запрос":>14}'
+            )
+            for engine in ENGINES:
+                with override_settings(
+                    SESSION_ENGINE=engine, ALLOWED_HOSTS=['testserver']
+                ):
+                    client = Client()
+                    client.force_login(user)
+                    client.get(url)
+                    reset_queries()
+                    with CaptureQueriesContext(connection) as context:
+                        client.get(url)
+                    queries = len(context.captured_queries)
+                    elapsed = measure(
+                        lambda: [
+                            client.get(url)
+                            for _ in range(options['requests'])
+                        ],
+                        options['repeat'],
+                    )
+                name = engine.rsplit('.', 1)[-1]
+                self.stdout.write(
+                    f'{name:<16} '
+                    f'{options["requests"] * 1000 / elapsed:>12.0f} '
+                    f'{queries:>14}'
+                )
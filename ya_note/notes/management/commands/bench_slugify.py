@@ -0,0 +1,51 @@
+import random
+from timeit import timeit
+
+from django.core.management.base import BaseCommand
+from pytils.translit import slugify
+
+from notes.slugs import slugify_cache_stats, slugify_title
+
+TITLES = (
+    'Название заметки',
+    'Список покупок',
+    'Планы на неделю',
+    'Идеи для отпуска',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время транслитерации заголовков pytils.slugify '
+        'и кешированной slugify_title.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=100_000)
+        parser.add_argument(
+            '--unique-share', type=float, default=0.1,
+            help='Доля уникальных заголовков среди повторяющихся.'
+        )
+
+    def handle(self, *args, **options):
+        generator = random.Random(0)
+        titles = [
+            f'Заметка номер {index}'
+            if generator.random() < options['unique_share']
+            else generator.choice(TITLES)
+            for index in range(options['calls'])
+        ]
+        for name, func in (
+            ('pytils.slugify', slugify), ('slugify_title', slugify_title)
+        ):
+            elapsed = timeit(
+                lambda: [func(title) for title in titles], number=1
+            )
+            self.stdout.write(
+                f'{name:<16} {elapsed / len(titles) * 1e6:>8.2f} мкс на вызов'
+            )
+        stats = slugify_cache_stats()
+        self.stdout.write(
+            f'Попаданий в кеш: {stats["hits"]}, промахов: {stats["misses"]}, '
+            f'доля попаданий: {stats["hit_rate"]:.1%}'
+        )
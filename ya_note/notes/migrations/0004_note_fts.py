@@ -0,0 +1,55 @@
+from django.db import migrations
+
+# Буква «ё» в индексе заменяется на «е», чтобы поиск их не различал.
+NORMALIZE = "replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+NEW_VALUES = (
+    'new.id, new.author_id, '
+    + NORMALIZE.format(column='new.title') + ', '
+    + NORMALIZE.format(column='new.text')
+)
+OLD_VALUES = (
+    "'delete', old.id, old.author_id, "
+    + NORMALIZE.format(column='old.title') + ', '
+    + NORMALIZE.format(column='old.text')
+)
+
+CREATE_SQL = [
+    "CREATE VIRTUAL TABLE notes_note_fts USING fts5("
+    "author_id, title, text, "
+    "content='notes_note', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    # Совпадение в заголовке весит больше, чем в тексте.
+    "INSERT INTO notes_note_fts(notes_note_fts, rank) "
+    "VALUES ('rank', 'bm25(0.0, 10.0, 1.0)')",
+    "CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note BEGIN "
+    "INSERT INTO notes_note_fts(rowid, author_id, title, text) "
+    f"VALUES ({NEW_VALUES}); END",
+    "CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note BEGIN "
+    "INSERT INTO notes_note_fts(notes_note_fts, rowid, author_id, title, text) "
+    f"VALUES ({OLD_VALUES}); END",
+    "CREATE TRIGGER notes_note_fts_update AFTER UPDATE ON notes_note BEGIN "
+    "INSERT INTO notes_note_fts(notes_note_fts, rowid, author_id, title, text) "
+    f"VALUES ({OLD_VALUES}); "
+    "INSERT INTO notes_note_fts(rowid, author_id, title, text) "
+    f"VALUES ({NEW_VALUES}); END",
+    "INSERT INTO notes_note_fts(rowid, author_id, title, text) "
+    "SELECT " + NEW_VALUES.replace('new.', '') + " FROM notes_note",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER notes_note_fts_update',
+    'DROP TRIGGER notes_note_fts_delete',
+    'DROP TRIGGER notes_note_fts_insert',
+    'DROP TABLE notes_note_fts',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_author_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, DROP_SQL),
+    ]
@@ -1,7 +1,7 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
-from pytils.translit import slugify
+from .slugs import numbered_slug, reserve_numbers, slugify_title
 
 
 class Note(models.Model):
@@ -28,11 +28,33 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        base = slugify_title(self.title)[:max_slug_length]
+        while True:
+            self.slug = numbered_slug(
+                base, reserve_numbers(base), max_slug_length
+            )
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Номер мог совпасть со slug, заданным вручную.
+                if not Note.objects.filter(slug=self.slug).exists():
+                    raise
+
+
+class SlugCounter(models.Model):
+    """Последний выданный номер для каждой основы slug."""
+    base = models.CharField(max_length=100, primary_key=True)
+    value = models.PositiveIntegerField(default=0)
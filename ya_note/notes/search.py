@@ -0,0 +1,52 @@
+import re
+
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Note
+
+MARK_START = '\x02'
+MARK_END = '\x03'
+SEARCH_SQL = (
+    'SELECT notes_note.id, notes_note.title, notes_note.slug, '
+    "snippet(notes_note_fts, 2, %s, %s, '…', 12) AS snippet "
+    'FROM notes_note_fts '
+    'JOIN notes_note ON notes_note.id = notes_note_fts.rowid '
+    'WHERE notes_note_fts MATCH %s '
+    'ORDER BY rank LIMIT %s'
+)
+
+
+def build_match(author_id, query):
+    """
+    Выражение FTS5 для поиска среди заметок одного автора.
+
+    Каждое слово запроса берётся в кавычки, чтобы пользователь не мог
+    применить синтаксис FTS5, последнее ищется как префикс.
+    """
+    words = re.findall(r'\w+', query.replace('ё', 'е').replace('Ё', 'Е'))
+    if not words:
+        return None
+    terms = ' '.join(f'"{word}"' for word in words) + '*'
+    return f'author_id : "{author_id}" AND {{title text}} : ({terms})'
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def search_notes(author, query, limit):
+    """Заметки автора, подходящие под запрос, от самых релевантных."""
+    match = build_match(author.pk, query)
+    if match is None:
+        return []
+    notes = list(Note.objects.raw(
+        SEARCH_SQL, [MARK_START, MARK_END, match, limit]
+    ))
+    for note in notes:
+        note.snippet = highlight(note.snippet)
+    return notes
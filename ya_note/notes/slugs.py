@@ -0,0 +1,110 @@
+from collections import defaultdict
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+from pytils.translit import slugify
+
+RESERVE_BATCH_SIZE = 500
+
+
+@lru_cache(maxsize=settings.SLUGIFY_CACHE_SIZE)
+def slugify_title(title):
+    """Транслитерация заголовка с кешем для повторяющихся заголовков."""
+    return slugify(title)
+
+
+def slugify_cache_stats():
+    """Статистика кеша транслитерации."""
+    info = slugify_title.cache_info()
+    calls = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'hit_rate': info.hits / calls if calls else 0.0,
+    }
+
+
+def reserve_numbers(base, count=1):
+    """
+    Резервирует count порядковых номеров для основы slug.
+
+    Счётчик увеличивается одним запросом INSERT ... ON CONFLICT, поэтому
+    параллельные сохранения не получат одинаковый номер.
+    Возвращает первый зарезервированный номер.
+    """
+    return reserve_many({base: count})[base]
+
+
+def reserve_many(counts):
+    """
+    Резервирует номера сразу для нескольких основ.
+
+    counts — словарь {основа: сколько номеров}, результат —
+    {основа: первый номер}. Основы отправляются пачками по
+    RESERVE_BATCH_SIZE строк в одном запросе.
+    """
+    counter_model = apps.get_model('notes', 'SlugCounter')
+    table = connection.ops.quote_name(counter_model._meta.db_table)
+    items = list(counts.items())
+    first = {}
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), RESERVE_BATCH_SIZE):
+            chunk = items[start:start + RESERVE_BATCH_SIZE]
+            rows = ', '.join(['(%s, %s)'] * len(chunk))
+            cursor.execute(
+                f'INSERT INTO {table} (base, value) VALUES {rows} '
+                f'ON CONFLICT (base) DO UPDATE '
+                f'SET value = value + excluded.value '
+                f'RETURNING base, value',
+                [param for item in chunk for param in item],
+            )
+            for base, last in cursor.fetchall():
+                first[base] = last - counts[base] + 1
+    return first
+
+
+def numbered_slug(base, number, max_length):
+    """Первый номер даёт саму основу, следующие — основу с суффиксом."""
+    if number == 1:
+        return base[:max_length]
+    suffix = f'-{number}'
+    return base[:max_length - len(suffix)] + suffix
+
+
+def allocate_slugs(bases, max_length, reserved=()):
+    """
+    Уникальные slug для пачки заметок.
+
+    Номера для всех основ резервируются одним запросом на проход,
+    занятость всех кандидатов проверяется одним запросом на проход.
+    reserved — slug, которые уже отданы другим заметкам пачки.
+    """
+    note_model = apps.get_model('notes', 'Note')
+    slugs = [None] * len(bases)
+    assigned = set(reserved)
+    pending = list(range(len(bases)))
+    while pending:
+        groups = defaultdict(list)
+        for index in pending:
+            groups[bases[index]].append(index)
+        first = reserve_many({
+            base: len(indexes) for base, indexes in groups.items()
+        })
+        candidates = {}
+        for base, indexes in groups.items():
+            for number, index in enumerate(indexes, start=first[base]):
+                candidates[index] = numbered_slug(base, number, max_length)
+        taken = set(note_model.objects.filter(
+            slug__in=candidates.values()
+        ).values_list('slug', flat=True))
+        pending = []
+        for index, slug in candidates.items():
+            if slug in taken or slug in assigned:
+                pending.append(index)
+            else:
+                slugs[index] = slug
+                assigned.add(slug)
+    return slugs
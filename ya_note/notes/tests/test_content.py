@@ -1,5 +1,9 @@
+from http import HTTPStatus
+from io import StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
 
 from notes.models import Note
@@ -30,6 +34,44 @@ class TestContent(TestCase):
             ('notes:edit', (cls.note_author.slug,)),
         )
 
+    def test_notes_list_single_query(self):
+        """Список заметок берёт сессию и пользователя из кеша."""
+        self.client.force_login(self.author)
+        url = reverse('notes:list')
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_cached_user_refreshed_after_save(self):
+        """Изменения пользователя видны в следующем запросе."""
+        user = User.objects.create(username='Старое имя')
+        self.client.force_login(user)
+        url = reverse('notes:list')
+        self.client.get(url)
+        user.username = 'Новое имя'
+        user.save()
+        response = self.client.get(url)
+        self.assertContains(response, 'Новое имя')
+
+    def test_session_with_model_backend_kept(self):
+        """Сессии, созданные до включения кеша, остаются действительными."""
+        self.client.force_login(
+            self.author, backend='django.contrib.auth.backends.ModelBackend'
+        )
+        response = self.client.get(reverse('notes:list'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_password_change_ends_cached_session(self):
+        """После смены пароля закешированная сессия недействительна."""
+        user = User.objects.create(username='Сменит пароль')
+        self.client.force_login(user)
+        url = reverse('notes:list')
+        self.client.get(url)
+        user.set_password('new-password')
+        user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
     def test_notes_list_for_different_users(self):
         """Пользователь видит только свои заметки."""
         self.client.force_login(self.author)
@@ -39,6 +81,45 @@ class TestContent(TestCase):
         self.assertIn(self.note_author, object_list)
         self.assertNotIn(self.note_reader, object_list)
 
+    @override_settings(NOTES_COUNT_ON_PAGE=1)
+    def test_notes_list_pagination(self):
+        """Список заметок выдаётся по страницам без повторов."""
+        Note.objects.create(
+            title='Вторая', text='Текст', slug='second', author=self.author
+        )
+        self.client.force_login(self.author)
+        url = reverse('notes:list')
+        response = self.client.get(url)
+        first_page = list(response.context['object_list'])
+        response = self.client.get(
+            url, {'after': response.context['next_cursor']}
+        )
+        second_page = list(response.context['object_list'])
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertCountEqual(
+            first_page + second_page, Note.objects.filter(author=self.author)
+        )
+
+    def test_search_finds_only_own_notes(self):
+        """Поиск находит заметки пользователя и подсвечивает совпадения."""
+        note = Note.objects.create(
+            title='Покупки',
+            text='Купить ёлку и гирлянду',
+            slug='shopping',
+            author=self.author,
+        )
+        Note.objects.create(
+            title='Покупки',
+            text='Купить ёлку',
+            slug='other_shopping',
+            author=self.reader,
+        )
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('notes:search'), {'q': 'елк'})
+        object_list = response.context['object_list']
+        self.assertEqual([found.pk for found in object_list], [note.pk])
+        self.assertIn('<mark>ёлку</mark>', object_list[0].snippet)
+
     def test_authorized_client_has_form(self):
         """На страницы создания и редактирования заметки передаются формы."""
         self.client.force_login(self.author)
@@ -47,3 +128,12 @@ class TestContent(TestCase):
                 url = reverse(name, args=args)
                 response = self.client.get(url)
                 self.assertIn('form', response.context)
+
+
+class TestTemplates(SimpleTestCase):
+
+    def test_all_templates_compile(self):
+        """Все шаблоны проекта компилируются без ошибок."""
+        output = StringIO()
+        call_command('check_templates', stdout=output)
+        self.assertIn('notes/list.html', output.getvalue())
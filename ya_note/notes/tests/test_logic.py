@@ -1,12 +1,19 @@
+from datetime import timedelta
 from http import HTTPStatus
+from io import StringIO
 
 from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
 from django.test import Client, TestCase
 from django.urls import reverse
+from django.utils import timezone
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.files.uploadedfile import SimpleUploadedFile
 
 from pytils.translit import slugify
 
+from notes.archive import ARCHIVE_ERROR, LINE_ERROR
 from notes.forms import WARNING
 from notes.models import Note
 
@@ -65,6 +72,17 @@ class TestNoteCreation(TestCase):
         expected_slug = slugify(self.form_data['title'])
         self.assertEqual(new_note.slug, expected_slug)
 
+    def test_same_titles_get_distinct_slugs(self):
+        """Заметки с одинаковыми заголовками получают разные slug."""
+        self.form_data.pop('slug')
+        for _ in range(3):
+            self.auth_client.post(self.url, data=self.form_data)
+        expected_slug = slugify(self.form_data['title'])
+        self.assertCountEqual(
+            Note.objects.values_list('slug', flat=True),
+            (expected_slug, f'{expected_slug}-2', f'{expected_slug}-3'),
+        )
+
 
 class TestNoteEditDelete(TestCase):
     TITLE_FIELD = 'Заголовок'
@@ -156,3 +174,76 @@ class TestNoteEditDelete(TestCase):
         self.assertEqual(notes_count_after, notes_count_before)
         self.note.refresh_from_db()
         self.assertEqual(self.note.title, self.TITLE_FIELD)
+
+
+class TestNotesArchive(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор заметки')
+        cls.auth_client = Client()
+        cls.auth_client.force_login(cls.author)
+        Note.objects.create(title='Заметка', text='Текст', author=cls.author)
+        Note.objects.create(title='Заметка', text='Текст', author=cls.author)
+
+    def test_export_import_round_trip(self):
+        """Выгруженный архив загружается обратно с новыми slug."""
+        response = self.auth_client.get(reverse('notes:export'))
+        archive = SimpleUploadedFile(
+            'notes.jsonl.gz', b''.join(response.streaming_content)
+        )
+        response = self.auth_client.post(
+            reverse('notes:import'), data={'archive': archive}
+        )
+        self.assertRedirects(response, reverse('notes:success'))
+        slugs = list(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(len(slugs), 4)
+        self.assertEqual(len(set(slugs)), 4)
+
+    def test_broken_archive_imports_nothing(self):
+        """Архив с ошибкой не загружается совсем."""
+        archive = SimpleUploadedFile(
+            'notes.jsonl', '{"title": "А", "text": "Б"}\nне json\n'.encode()
+        )
+        response = self.auth_client.post(
+            reverse('notes:import'), data={'archive': archive}
+        )
+        self.assertFormError(response, 'form', 'archive', LINE_ERROR.format(2))
+        self.assertEqual(Note.objects.count(), 2)
+
+    def test_unreadable_archive_is_form_error(self):
+        """Файл не в UTF-8 или обрезанный gzip дают ошибку формы."""
+        response = self.auth_client.get(reverse('notes:export'))
+        exported = b''.join(response.streaming_content)
+        for name, content in (
+            ('notes.jsonl', '{"title": "А"}'.encode('cp1251')),
+            ('notes.jsonl.gz', exported[:len(exported) // 2]),
+            ('notes.jsonl.gz', exported[:10] + b'\xff' * 20),
+        ):
+            with self.subTest(name=name, content=content):
+                response = self.auth_client.post(
+                    reverse('notes:import'),
+                    data={'archive': SimpleUploadedFile(name, content)},
+                )
+                self.assertFormError(
+                    response, 'form', 'archive', ARCHIVE_ERROR
+                )
+        self.assertEqual(Note.objects.count(), 2)
+
+
+class TestCleanupSessions(TestCase):
+
+    def test_only_expired_sessions_deleted(self):
+        """Удаляются только истёкшие сессии."""
+        now = timezone.now()
+        Session.objects.bulk_create(
+            Session(
+                session_key=f'key{index}',
+                session_data='',
+                expire_date=now + timedelta(days=1 if index % 2 else -1),
+            )
+            for index in range(10)
+        )
+        call_command('cleanup_sessions', batch_size=3, stdout=StringIO())
+        self.assertEqual(Session.objects.count(), 5)
+        self.assertFalse(Session.objects.filter(expire_date__lt=now).exists())
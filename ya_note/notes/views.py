@@ -1,9 +1,14 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ValidationError
+from django.http import Http404, StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from .archive import export_notes, import_notes
+from .forms import NoteForm, NoteImportForm
 from .models import Note
+from .search import search_notes
 
 
 class Home(generic.TemplateView):
@@ -50,9 +55,83 @@ class NoteDelete(NoteBase, generic.DeleteView):
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """
+    Список всех заметок пользователя.
+
+    Страницы выдаются по курсору — id последней показанной заметки,
+    поэтому их стоимость не зависит от общего числа заметок.
+    """
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        after = self.request.GET.get('after', '')
+        if after and not after.isdigit():
+            raise Http404('Страница списка заметок не найдена.')
+        queryset = super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('id')
+        if after:
+            queryset = queryset.filter(id__gt=after)
+        size = settings.NOTES_COUNT_ON_PAGE
+        notes = list(queryset[:size + 1])
+        self.next_cursor = notes[size - 1].id if len(notes) > size else None
+        return notes[:size]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.next_cursor
+        return context
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        return search_notes(
+            self.request.user,
+            self.request.GET.get('q', ''),
+            settings.NOTES_COUNT_ON_PAGE,
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class NotesExport(LoginRequiredMixin, generic.View):
+    """Выгрузка всех заметок пользователя одним архивом."""
+
+    def get(self, request):
+        response = StreamingHttpResponse(
+            export_notes(request.user, settings.NOTES_EXPORT_CHUNK_SIZE),
+            content_type='application/gzip',
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename="notes.jsonl.gz"'
+        )
+        return response
+
+
+class NotesImport(LoginRequiredMixin, generic.FormView):
+    """Загрузка заметок из архива."""
+    template_name = 'notes/import.html'
+    form_class = NoteImportForm
+    success_url = reverse_lazy('notes:success')
+
+    def form_valid(self, form):
+        try:
+            import_notes(
+                self.request.user,
+                form.cleaned_data['archive'],
+                settings.NOTES_IMPORT_BATCH_SIZE,
+            )
+        except ValidationError as error:
+            form.add_error('archive', error)
+            return self.form_invalid(form)
+        return super().form_valid(form)
+
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
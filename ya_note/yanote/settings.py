@@ -37,7 +37,7 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
+        'APP_DIRS': False,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -45,6 +45,14 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Шаблоны разбираются один раз на процесс и при любом DEBUG;
+            # runserver сбрасывает кеш при изменении файлов.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -56,6 +64,15 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 60,
+        # Выполняются для каждого нового соединения, см. notes/signals.py.
+        'PRAGMAS': {
+            'journal_mode': 'wal',
+            'synchronous': 'normal',
+            'busy_timeout': 5000,
+            'cache_size': -20000,
+            'mmap_size': 128 * 1024 * 1024,
+        },
     }
 }
 
@@ -87,3 +104,52 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+SLUGIFY_CACHE_SIZE = 4096
+
+NOTES_COUNT_ON_PAGE = 50
+
+NOTES_EXPORT_CHUNK_SIZE = 1000
+
+NOTES_IMPORT_BATCH_SIZE = 1000
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Записи сбрасываются сигналами в том процессе, где изменили
+    # пользователя, поэтому кеш тоже должен быть общим.
+    'users': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'users',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10_000,
+        },
+    },
+    # Кеш сессий должен быть общим для всех процессов: иначе выход
+    # удаляет сессию только из памяти одного из них. Подойдёт и
+    # memcached или redis, но не locmem.
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'sessions',
+    },
+}
+
+# Сессии читаются из кеша и сохраняются ещё и в базу. Чтобы не обращаться
+# к серверу совсем, храните их в подписанной cookie:
+# SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Только общий для процессов кеш, см. CACHES['sessions'].
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Пользователь запроса берётся из кеша AUTH_USER_CACHE_ALIAS.
+# ModelBackend остаётся в списке, чтобы сессии, созданные до включения
+# кеша, не разлогинивались; после нового входа они тоже идут через кеш.
+AUTHENTICATION_BACKENDS = [
+    'notes.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+AUTH_USER_CACHE_ALIAS = 'users'